@@ -1,21 +1,50 @@
+import json
+import hashlib
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import List, Tuple, Dict
-from dotenv import dotenv_values
+import numpy as np
+from typing import Any, Dict, Optional
 import pandas as pd
 
+from aggregates import DatasetAggregates
+from utils import Utils
+
 
 class GenerateGraph:
-    def __init__(self, data) -> None:
-        self.PATH = dotenv_values('.env')['PATH']
+    # charts only read self.df and the aggregates, they never modify or save data
+    def __init__(self, data, aggregates: Optional[Dict[str, Any]] = None) -> None:
         self.df = data
+        # served by /api/aggregates/, computed from the data if not given
+        self.aggregates = aggregates
+        self.version: Optional[str] = None
+
+    def data_version(self) -> str:
+        # digest of the aggregates the charts are drawn from, same data gives same charts
+        if self.version is None:
+            payload = json.dumps(self.get_aggregates(), sort_keys=True, default=str)
+            self.version = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+        return self.version
+
+    def get_aggregates(self) -> Dict[str, Any]:
+        if self.aggregates is None:
+            self.aggregates = DatasetAggregates.from_frame(self.df).to_dict()
+        return self.aggregates
+
+    def group_means(self, key: str, **averages: str) -> pd.DataFrame:
+        # one row per group: the key, the row count and the requested column means
+        table = self.get_aggregates()['by_age' if key == 'Age' else 'by_occupation']
+        return pd.DataFrame({
+            key: table[key],
+            'count': table['count'],
+            **{name: table['mean'][column] for name, column in averages.items()}
+        })
 
     def generate_gender_chart(self):
-        value_counts_gender = self.df['Gender'].value_counts()
+        value_counts_gender = self.get_aggregates()['gender_counts']
         fig_gender = go.Figure(data=[
         go.Pie(
-            labels=value_counts_gender.index,
-            values=value_counts_gender.values,
+            labels=list(value_counts_gender.keys()),
+            values=list(value_counts_gender.values()),
             hole=0.6,
             marker=dict(colors=['rgb(135, 206, 235)', 'rgb(238, 130, 238)']),
             textinfo='label+percent'
@@ -32,13 +61,13 @@ class GenerateGraph:
 
     def generate_occupation_chart(self):
         # group occupation data
-        value_counts_occupation = self.df['Occupation'].value_counts()
+        value_counts_occupation = self.get_aggregates()['occupation_counts']
 
         # set occupation statistics
         fig_occupation = go.Figure(data=[
             go.Pie(
-                labels=value_counts_occupation.index,
-                values=value_counts_occupation.values,
+                labels=list(value_counts_occupation.keys()),
+                values=list(value_counts_occupation.values()),
                 hole=0.3,
                 textinfo='label+percent'
             )
@@ -57,10 +86,7 @@ class GenerateGraph:
 
     def generate_stress_occupation_chart(self):
         # group data
-        average_stress_table = self.df.groupby('Occupation').agg(
-            average_stress_level=('Stress Level', 'mean'),
-            count=('Stress Level', 'size')
-        ).reset_index()
+        average_stress_table = self.group_means('Occupation', average_stress_level='Stress Level')
 
         # sort
         average_stress_table = average_stress_table.sort_values(by='average_stress_level',
@@ -91,34 +117,45 @@ class GenerateGraph:
 
 
     def generate_spray_graph(self):
+        # bin counts are computed by the backend, only the bin matrix is drawn
+        spray = self.get_aggregates()['spray']
+        age_edges = np.asarray(spray['age_edges'])
+        value_edges = np.asarray(spray['value_edges'])
+        ages = (age_edges[:-1] + age_edges[1:]) / 2
+        values = (value_edges[:-1] + value_edges[1:]) / 2
+
+        def bin_matrix(column: str) -> np.ndarray:
+            # rows are value bins, empty bins are left out
+            counts = np.asarray(spray['counts'][column], dtype=float).T
+            counts[counts == 0] = np.nan
+            return counts
+
         fig_spray = go.Figure()
         # add sleep duration data
-        fig_spray.add_trace(go.Histogram2d(
-            x = self.df['Age'],
-            y = self.df['Sleep Duration'],
+        fig_spray.add_trace(go.Heatmap(
+            x = ages,
+            y = values,
+            z = bin_matrix('Sleep Duration'),
             colorscale=[
                 [0, 'rgba(0, 0, 0, 0)'],
                 [0.5, 'rgba(0, 130, 180, 0.5)'],
                 [1, 'rgb(0, 130, 180)']
             ],
-            nbinsx=60,
-            nbinsy=30,
             opacity=0.75,
             colorbar=dict(title='Sleep Freq', x=1.0),
             showscale=True
         ))
 
         # add stress level data
-        fig_spray.add_trace(go.Histogram2d(
-            x = self.df['Age'],
-            y = self.df['Stress Level'],
+        fig_spray.add_trace(go.Heatmap(
+            x = ages,
+            y = values,
+            z = bin_matrix('Stress Level'),
             colorscale=[
                 [0, 'rgba(0, 0, 0, 0)'],
                 [0.5, 'rgba(205, 92, 92, 0.5)'],
                 [1, 'rgb(205, 92, 92)']
             ],
-            nbinsx=60,
-            nbinsy=30,
             opacity=0.75,
             colorbar=dict(title='Stress Freq', x=1.2),
             showscale=True
@@ -129,7 +166,6 @@ class GenerateGraph:
             title='Sleep Duration vs Stress Level',
             xaxis_title='Age',
             yaxis_title='Value',
-            barmode='overlay',
             template='plotly_dark'
         )
 
@@ -138,26 +174,10 @@ class GenerateGraph:
 
 
     def generate_average_chart(self):
-        # find every useful points
-        def fnd(values: List[float]) -> Tuple[List[int], List[int]]:
-            peaks = []
-            downs = []
-            mx = max(values)
-            mn = min(values)
-            for i in range(1, len(values) - 1):
-                if values[i] > values[i - 1] and values[i] > values[i + 1] and values[i] != mx:
-                    peaks.append(i)
-                elif values[i] < values[i - 1] and values[i] < values[i + 1] and values[i] != mn:
-                    downs.append(i)
-            return downs, peaks
-
         fig_graph = go.Figure()
         
         # group data into two columns by average values: average sleep and average stress
-        grouped_df = self.df.groupby('Age').agg(
-            average_sleep=('Sleep Duration', 'mean'),
-            average_stress=('Stress Level', 'mean')
-        ).reset_index()
+        grouped_df = self.group_means('Age', average_sleep='Sleep Duration', average_stress='Stress Level')
 
         # find peaks and downs
         sleep_min = grouped_df.loc[grouped_df["average_sleep"].idxmin()]
@@ -166,9 +186,10 @@ class GenerateGraph:
         stress_min = grouped_df.loc[grouped_df["average_stress"].idxmin()]
         stress_max = grouped_df.loc[grouped_df["average_stress"].idxmax()]
 
-        # finding them
-        sleep_mins, sleep_maxes = fnd(grouped_df['average_sleep'].values)
-        stress_mins, stress_maxes = fnd(grouped_df['average_stress'].values)
+        # finding them, both series in one call
+        downs, peaks = Utils.local_extrema(grouped_df[['average_sleep', 'average_stress']].to_numpy().T)
+        sleep_mins, stress_mins = (np.flatnonzero(row) for row in downs)
+        sleep_maxes, stress_maxes = (np.flatnonzero(row) for row in peaks)
 
         # define common line styles
         line_styles: Dict[str, Dict[str, str]] = {
@@ -244,18 +265,10 @@ class GenerateGraph:
     def generate_phys_sleep_chart(self):
         fig_phyz = go.Figure()
         # group data by average values
-        grouped_df = self.df.groupby('Age').agg(
-            average_physical=('Physical Activity Level', 'mean'),
-            average_quality=('Quality of Sleep', 'mean'),
-            average_stress=('Stress Level', 'mean')
-        ).reset_index()
-
-        try:
-            self.df = pd.merge(self.df, grouped_df, on='Age', how='left')
-        except Exception as e:
-            print(e)
-
-        self.df.to_csv(self.PATH, index=False)
+        grouped_df = self.group_means('Age',
+                                      average_physical='Physical Activity Level',
+                                      average_quality='Quality of Sleep',
+                                      average_stress='Stress Level')
 
         # add average sleep quality line
         fig_phyz.add_trace(go.Scatter(
@@ -302,11 +315,10 @@ class GenerateGraph:
     def generate_duration_vs_quality_vs_phys_chart(self):
         fig_duration_vs_quality_vs_phyz = go.Figure()
         # group data by average values
-        grouped_df = self.df.groupby('Age').agg(
-            average_physical=('Physical Activity Level', 'mean'),
-            average_quality=('Quality of Sleep', 'mean'),
-            average_duration=('Sleep Duration', 'mean')
-        ).reset_index()
+        grouped_df = self.group_means('Age',
+                                      average_physical='Physical Activity Level',
+                                      average_quality='Quality of Sleep',
+                                      average_duration='Sleep Duration')
 
         # add average sleep quality line
         fig_duration_vs_quality_vs_phyz.add_trace(go.Scatter(
@@ -349,10 +361,10 @@ class GenerateGraph:
 
 
     def generate_pearsons_mtx(self):
-        columns = ['Sleep Duration', 'Quality of Sleep', 'Physical Activity Level', 'Stress Level']
-        grouped_df = self.df[columns]
+        aggregates = self.get_aggregates()
+        columns = aggregates['columns']
 
-        correl_mtx = grouped_df.corr(method='pearson')
+        correl_mtx = pd.DataFrame(aggregates['correlation']['matrix'], index=columns, columns=columns, dtype=float)
         fig_temp = px.imshow(
             correl_mtx,
             text_auto=True,
@@ -0,0 +1,109 @@
+import time
+import logging
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # optional, only needed for the async client
+    httpx = None
+
+import data.cfg as cfg
+
+
+class ApiClient:
+    """
+    ApiClient is the HTTP client the frontend uses to talk to the backend:
+    - One pooled keep-alive session, shared by all calls.
+    - Connect and read timeouts on every request.
+    - Bounded retries with exponential backoff for GET requests and failed
+      connections; other requests are never sent twice.
+    - Latency of every call is logged.
+    - An optional httpx client (HTTP/2 capable) for async callers.
+    """
+
+    def __init__(self,
+                 connect_timeout: float = cfg.API_CONNECT_TIMEOUT_S,
+                 read_timeout: float = cfg.API_READ_TIMEOUT_S,
+                 retries: int = cfg.API_RETRIES,
+                 backoff: float = cfg.API_BACKOFF_S,
+                 pool_size: int = cfg.API_POOL_SIZE) -> None:
+        """
+        Initialize the client and its connection pool.
+
+        Args:
+            connect_timeout (float, optional): Seconds to wait for a connection.
+            read_timeout (float, optional): Seconds to wait for a response.
+            retries (int, optional): Maximum number of retries.
+            backoff (float, optional): Backoff factor between retries, in seconds.
+            pool_size (int, optional): Connections kept open to the backend.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size: int = pool_size
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send a request through the pooled session and log its latency.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            **kwargs (Any): Passed to requests (params, json, ...).
+
+        Returns:
+            requests.Response: The response.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.logger.warning(f"{method} {url} failed after {(time.perf_counter() - start) * 1000:.1f} ms: {e}")
+            raise
+        self.logger.info(f"{method} {url} -> {response.status_code} in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return response
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def async_client(self) -> "httpx.AsyncClient":
+        """
+        Create an async client with the same timeouts and pool size, to be used
+        as an async context manager. HTTP/2 is used if enabled in cfg and the h2
+        package is installed.
+
+        Returns:
+            httpx.AsyncClient: The client.
+        """
+        if httpx is None:
+            raise ImportError("httpx is required for the async client.")
+
+        connect_timeout, read_timeout = self.timeout
+        options = dict(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        )
+        try:
+            return httpx.AsyncClient(http2=cfg.API_HTTP2, **options)
+        except ImportError:
+            self.logger.warning("h2 is not installed, using HTTP/1.1.")
+            return httpx.AsyncClient(**options)
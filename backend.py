@@ -1,38 +1,116 @@
 import os
+import time
+import uuid
+import asyncio
+import hashlib
 import logging
-
-from typing import Dict, Any
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from typing import Dict, Any, Callable, Hashable, List, Optional, Iterable
 from dotenv import dotenv_values
 import uvicorn
 import pandas as pd
-import numpy as np
-import joblib
 
 from fastapi import FastAPI, HTTPException
-from data.base_model import FormData
+from pydantic import ValidationError
+from data.base_model import FormData, PredictionData
 from routes import Routes
+from storage import DataStorage, open_storage
+from batching import MicroBatcher
+from cache import LRUCache
+from frame_cache import DataFrameCache
+from aggregates import DatasetAggregates
+from cleaning import clean_storage, load_clean_job, load_clean_state, save_clean_job, save_clean_state
+from executors import BoundedExecutor, ExecutorBusy
+from file_lock import FileLock
+from train_model import ModelTrainer
+from model_registry import LoadedModel, ModelRegistry
 import data.cfg as cfg
 
 
 class SleepDataBackend:
     """
     SleepDataBackend is responsible for providing an API that:
-    - Cleans and processes sleep data from a CSV file.
-    - Submits new data entries into the CSV file.
+    - Cleans and processes sleep data from the dataset storage (CSV or columnar).
+    - Submits new data entries into the dataset.
     - Provides routes for data cleaning and data submission.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, engine: str = cfg.PREDICT_ENGINE) -> None:
         """
         Initialize the backend by setting up logging, creating a FastAPI application,
         and adding routes.
+
+        Args:
+            engine (str, optional): Prediction engine, 'sklearn' or 'numpy'.
+                Defaults to cfg.PREDICT_ENGINE.
         """
         self.model_path = dotenv_values('.env')['MODEL_PATH']
-        self.model = self.load_model()
+        # Predictions keyed on normalized features, dropped whenever a model is loaded.
+        self.prediction_cache = LRUCache(cfg.PREDICTION_CACHE_SIZE, ttl=cfg.PREDICTION_CACHE_TTL_S)
+        # Versioned models, swapped in without restarting the server.
+        self.registry = ModelRegistry(
+            self.model_path,
+            cfg.MODEL_REGISTRY_DIR,
+            on_swap=self._on_model_swap,
+            engine=engine
+        )
+        self.load_model()
         self.setup_logging()
-        self.app = FastAPI()
+        self.app = FastAPI(lifespan=self.lifespan)
         self.PATH: str = dotenv_values('.env')['PATH']
 
+        self.storage: DataStorage = open_storage(self.PATH)
+        # One compacted in-memory copy of the dataset shared by all requests.
+        self.data_cache = DataFrameCache(self.storage)
+        # Chart aggregates and the storage mark they are up to date with. Appends,
+        # also those of other processes, update them row by row, anything else
+        # makes them rebuild on next use.
+        self._aggregates: Optional[DatasetAggregates] = None
+        self._aggregates_mark: Optional[Hashable] = None
+        self._aggregates_lock = threading.Lock()
+        self._aggregates_refresh_lock = threading.Lock()
+
+        # Writes are serialized by a lock within the process and a file lock
+        # across worker processes. The last Person ID is kept in memory and
+        # advanced over the rows other processes appended since this one wrote.
+        self._write_lock = asyncio.Lock()
+        self.file_lock = FileLock(f"{self.PATH}.lock")
+        self._last_person_id: Optional[int] = None
+        self._sequence_mark: Optional[Hashable] = None
+
+        # Cleaning runs as a background job; its status file is guarded by its
+        # own lock so status requests never wait for a running clean.
+        self._job_lock = FileLock(f"{self.PATH}.clean_job.lock")
+        self._clean_task: Optional[asyncio.Task] = None
+        # One retrain at a time, further requests are answered with 409.
+        self._retrain_lock = asyncio.Lock()
+
+        # Blocking work runs in bounded pools: storage I/O, pandas and predictions
+        # in threads, cleaning and training in separate processes.
+        self.io_executor = BoundedExecutor(
+            lambda: ThreadPoolExecutor(cfg.IO_WORKERS, thread_name_prefix='io'), cfg.IO_MAX_PENDING, 'io'
+        )
+        self.cpu_executor = BoundedExecutor(
+            lambda: ProcessPoolExecutor(cfg.CPU_WORKERS, mp_context=multiprocessing.get_context('spawn')),
+            cfg.CPU_MAX_PENDING,
+            'cpu'
+        )
+
+        # Concurrent single predictions are grouped into one model call.
+        self.prediction_batcher = MicroBatcher(
+            self._predict_rows,
+            window_ms=cfg.PREDICT_BATCH_WINDOW_MS,
+            max_batch_size=cfg.PREDICT_MAX_BATCH_SIZE,
+            max_queue_size=cfg.PREDICT_MAX_QUEUE_SIZE,
+            executor=self.io_executor.executor
+        )
+
         Routes(self.app, self)
 
     def setup_logging(self) -> None:
@@ -42,63 +120,272 @@ class SleepDataBackend:
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        """
+        Watch the model file for the lifetime of the application and stop the pools on shutdown.
+        """
+        watcher = asyncio.create_task(self.registry.watch(cfg.MODEL_WATCH_INTERVAL_S))
+        yield
+        watcher.cancel()
+        self.io_executor.shutdown()
+        self.cpu_executor.shutdown()
+
+    @property
+    def model(self):
+        """
+        The model currently served by the registry.
+        """
+        return self.registry.model
+
     def load_model(self):
         try:
-            model = joblib.load(self.model_path)
-            return model
+            return self.registry.load().model
         except Exception as e:
             logging.error(f"An error '{e}' occured while loading model.")
 
-    async def clean_data(self) -> Dict[str, Any]:
+    def _on_model_swap(self, loaded: LoadedModel) -> None:
         """
-        Clean the CSV data by:
-        - Removing rows with all NaN values.
-        - Removing rows where all numeric values are zero.
-        - Replacing infinite values with NaN.
-        - Dropping specified columns from configuration.
-        - Saving the cleaned data back to CSV.
+        Drop predictions made by the previous model.
+        """
+        self.prediction_cache.clear()
+
+    def model_info(self) -> Dict[str, Any]:
+        """
+        Describe the active model version and the archived ones.
 
         Returns:
-            Dict[str, Any]: Status message and a preview of the cleaned data.
+            Dict[str, Any]: The registry state.
+        """
+        return self.registry.info()
+
+    async def reload_model(self, version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Load a model version in the background and swap it in.
+
+        Args:
+            version (Optional[str], optional): Archived version to activate. Defaults to None,
+                which reloads the current model file.
+
+        Returns:
+            Dict[str, Any]: The registry state after the swap.
         """
         try:
-            df: pd.DataFrame = pd.read_csv(self.PATH)
-            self.logger.info('Original data loaded.')
+            await self.registry.reload(version)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except Exception as e:
+            self.logger.error(f"An error '{e}' occured while reloading model.")
+            raise HTTPException(status_code=500, detail=str(e))
+        return self.registry.info()
 
-            # Drop rows with all NaN values
-            df.dropna(how='all', inplace=True)
-            self.logger.info('Rows with all NaN values removed.')
+    @property
+    def data_version(self) -> str:
+        """
+        Version of the stored dataset. It is derived from the storage mark, so all
+        worker processes report the same version for the same data.
+        """
+        return hashlib.sha256(repr(self.storage.mark()).encode()).hexdigest()[:12]
 
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
+    @asynccontextmanager
+    async def _writer(self):
+        """
+        Hold the write lock of this process and the file lock shared with the other workers.
+        """
+        async with self._write_lock:
+            async with self.file_lock.hold_async():
+                yield
 
-            # Keep rows that have at least one non-zero numeric value
-            # First, drop rows where all numeric values are NaN
-            df.dropna(subset=numeric_cols, how='all', inplace=True)
-            # Keep rows where at least one numeric column is not zero
-            df = df[(df[numeric_cols] != 0).any(axis=1)]
-            self.logger.info('Rows with all zeros in numeric columns removed.')
+    def _next_person_id(self) -> int:
+        """
+        First free Person ID. Blocking, called with the write lock held.
+        """
+        if not self.storage.exists():
+            error_msg = "File not found."
+            self.logger.error(error_msg)
+            raise FileNotFoundError(error_msg)
 
-            # Replace infinite values with NaN
-            df.replace([np.inf, -np.inf], np.nan, inplace=True)
-            self.logger.info('Infinite values replaced with NaN.')
+        mark = self.storage.mark()
+        if self._last_person_id is not None and mark == self._sequence_mark:
+            return self._last_person_id + 1
+
+        # other processes appended since this one wrote: only their rows are read
+        appended = None if self._last_person_id is None else self.storage.read_since_with_mark(self._sequence_mark)
+        if appended is None:
+            self._last_person_id = self.storage.last_person_id()
+            self._sequence_mark = mark
+        else:
+            rows, self._sequence_mark = appended
+            last_person_id = rows["Person ID"].max() if len(rows) else None
+            if pd.notnull(last_person_id):
+                self._last_person_id = max(self._last_person_id, int(last_person_id))
+        return self._last_person_id + 1
+
+    async def schedule_clean(self) -> Dict[str, Any]:
+        """
+        Schedule a cleaning run in the background. If a run is already queued or
+        running, in this or another worker process, that job is returned instead.
 
-            # Drop specified columns
-            columns_to_delete = [col.strip().strip('"').strip("'") for col in cfg.COLUMNS_TO_DELETE]
-            df.drop(columns=columns_to_delete, errors='ignore', inplace=True)
-            self.logger.info('Specified columns removed.')
+        Returns:
+            Dict[str, Any]: Status of the job.
+        """
+        async with self._job_lock.hold_async():
+            job = self._job_status(load_clean_job(self.PATH))
+            if job is not None and job['status'] in ('queued', 'running'):
+                return job
+
+            job = {
+                'job_id': uuid.uuid4().hex[:12],
+                'status': 'queued',
+                'scheduled_at': datetime.now(timezone.utc).isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'duration_s': None,
+                'rows_processed': None,
+                'rows_removed': None,
+                'changed': None,
+                'compacted': None,
+                'data_version': None,
+                'error': None,
+                'pid': os.getpid()
+            }
+            save_clean_job(self.PATH, job)
+
+        self._clean_task = asyncio.create_task(self._run_clean_job(job))
+        self.logger.info(f"Clean job {job['job_id']} scheduled.")
+        return job
+
+    def clean_status(self) -> Dict[str, Any]:
+        """
+        Status of the last scheduled clean job.
 
-            df.to_csv(self.PATH, index=False)
-            self.logger.info('Changes saved to CSV.')
+        Returns:
+            Dict[str, Any]: The job status: queued, running, succeeded or failed,
+            rows processed and removed, and the duration in seconds.
+        """
+        job = self._job_status(load_clean_job(self.PATH))
+        if job is None:
+            raise HTTPException(status_code=404, detail="No clean job was scheduled.")
+        return job
 
-            return {'message': 'Data successfully cleared.', 'data': df.head().to_dict()}
+    @staticmethod
+    def _job_status(job: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Report a job that was left unfinished by a process that exited as failed.
+        """
+        if job is None or job['status'] not in ('queued', 'running'):
+            return job
+        try:
+            os.kill(job['pid'], 0)
+        except ProcessLookupError:
+            return {**job, 'status': 'failed', 'error': 'The process running the job exited.'}
+        except PermissionError:
+            pass
+        return job
+
+    async def _update_job(self, job: Dict[str, Any], **changes: Any) -> None:
+        job.update(changes)
+        async with self._job_lock.hold_async():
+            save_clean_job(self.PATH, job)
+
+    async def _run_clean_job(self, job: Dict[str, Any]) -> None:
+        """
+        Run a scheduled clean job and record its progress. The job waits for the
+        write lock, so it runs between submissions.
+        """
+        async with self._writer():
+            start = time.perf_counter()
+            await self._update_job(job, status='running', started_at=datetime.now(timezone.utc).isoformat())
+            try:
+                result = await self._clean()
+                changes = {
+                    'status': 'succeeded',
+                    'rows_processed': result['rows_checked'],
+                    'rows_removed': result['rows_removed'],
+                    'changed': result['changed'],
+                    'compacted': result['compacted'],
+                    'data_version': self.data_version
+                }
+            except HTTPException as e:
+                changes = {'status': 'failed', 'error': str(e.detail)}
+            except Exception as e:
+                self.logger.error(f"Error while clearing data: {e}")
+                changes = {'status': 'failed', 'error': str(e)}
+
+            await self._update_job(
+                job,
+                finished_at=datetime.now(timezone.utc).isoformat(),
+                duration_s=round(time.perf_counter() - start, 3),
+                **changes
+            )
+        self.logger.info(f"Clean job {job['job_id']} {job['status']} in {job['duration_s']}s.")
+
+    async def _clean(self) -> Dict[str, Any]:
+        """
+        Clean the stored data by:
+        - Keeping only the last row of every Person ID.
+        - Removing rows with all NaN values.
+        - Removing rows where all numeric values are zero.
+        - Removing rows with an infinite numeric value.
+        - Dropping specified columns from configuration.
+        - Saving the cleaned data back to storage.
+        - Compacting the storage if appends left it in too many files.
 
-        except Exception as e:
-            self.logger.error(f"Error while clearing data: {e}")
-            return {'error': str(e)}
+        Cleaning is incremental: after the first run only rows appended since the
+        previous run are checked, and nothing is written when they are already clean.
+        The last run is recorded next to the dataset and shared by all workers.
+        It runs in the process pool, so other requests are served meanwhile.
+        Called with the write lock held.
+
+        Returns:
+            Dict[str, Any]: rows_checked, rows_removed and whether the data changed
+            and was compacted.
+        """
+        clean_mark, numeric_cols = load_clean_state(self.PATH)
+        if clean_mark is not None and self.storage.mark() == clean_mark:
+            self.logger.info('Data already clean.')
+            return {'changed': False, 'compacted': False, 'rows_checked': 0, 'rows_removed': 0}
+
+        result = await self._offload(self.cpu_executor, clean_storage, self.PATH, clean_mark, numeric_cols)
+        save_clean_state(self.PATH, result['mark'], result['numeric_cols'])
+        if result['changed']:
+            self.data_cache.invalidate()
+        return result
+
+    async def retrain_model(self) -> Dict[str, Any]:
+        """
+        Train a new model on the stored data in the process pool and make it active.
+
+        Returns:
+            Dict[str, Any]: The registry state with the new model.
+        """
+        if self._retrain_lock.locked():
+            raise HTTPException(status_code=409, detail="A retrain is already running.")
+
+        async with self._retrain_lock:
+            trainer = ModelTrainer(self.PATH, self.model_path)
+            try:
+                await self._offload(self.cpu_executor, trainer.run)
+            except HTTPException:
+                raise
+            except Exception as e:
+                self.logger.error(f"An error '{e}' occured while training model.")
+                raise HTTPException(status_code=500, detail=str(e))
+            return await self.reload_model()
+
+    async def _offload(self, executor: BoundedExecutor, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking call in a pool, answering 503 when the pool is full.
+        """
+        try:
+            return await executor.run(fn, *args)
+        except ExecutorBusy as e:
+            self.logger.warning(str(e))
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
     async def submit_data(self, data: FormData) -> Dict[str, Any]:
         """
-        Submit a new data entry to the CSV file.
+        Submit a new data entry to the dataset.
 
         Args:
             data (FormData): The form data submitted by the user.
@@ -108,18 +395,200 @@ class SleepDataBackend:
         """
         self.logger.info(f"Received data to submit: {data}")
 
-        if not os.path.exists(self.PATH):
-            error_msg = "File not found."
-            self.logger.error(error_msg)
-            raise FileNotFoundError(error_msg)
+        async with self._writer():
+            new_person_id = await self._offload(self.io_executor, self._next_person_id)
+
+            new_data = self._build_row(data, new_person_id)
+            self.logger.info(f"Prepared new data entry: {new_data}")
+
+            await self._offload(self.io_executor, self._append_rows, [new_data])
+            self.logger.info("New data appended to storage.")
+
+        return {"message": "Data taken successfully!", "data": new_data}
+
+    async def submit_and_predict(self, data: FormData) -> Dict[str, Any]:
+        """
+        Submit a new data entry and predict its stress level in one call. The write
+        and the prediction run concurrently; a failed prediction is reported in the
+        result, the entry is kept.
+
+        Args:
+            data (FormData): The form data submitted by the user.
+
+        Returns:
+            Dict[str, Any]: Status message, the submitted data and the predicted stress level.
+        """
+        submission, prediction = await asyncio.gather(
+            self.submit_data(data),
+            self.predict_stress(data.gender, data.age, data.occupation,
+                                data.sleep_duration, data.quality_of_sleep, data.physical_activity_level),
+            return_exceptions=True
+        )
+        if isinstance(submission, BaseException):
+            raise submission
+
+        if isinstance(prediction, HTTPException):
+            return {**submission, "predicted_stress_level": None, "prediction_error": prediction.detail}
+        if isinstance(prediction, BaseException):
+            raise prediction
+        return {**submission, **prediction}
+
+    async def submit_batch(self, records: Iterable[Any]) -> Dict[str, Any]:
+        """
+        Submit many data entries at once. Every record is validated separately,
+        invalid ones are reported and skipped, the valid ones get one contiguous
+        Person ID range and are appended with a single write.
+
+        Args:
+            records (Iterable[Any]): Decoded JSON objects or raw NDJSON lines.
+
+        Returns:
+            Dict[str, Any]: Status message, counts, the assigned ID range and
+            validation errors by record index.
+        """
+        valid: List[FormData] = []
+        errors: List[Dict[str, Any]] = []
+
+        for index, record in enumerate(records):
+            try:
+                if isinstance(record, (str, bytes)):
+                    valid.append(FormData.model_validate_json(record))
+                else:
+                    valid.append(FormData.model_validate(record))
+            except ValidationError as e:
+                errors.append({
+                    "index": index,
+                    "errors": e.errors(include_url=False, include_context=False)
+                })
+
+        self.logger.info(f"Received batch: {len(valid)} valid, {len(errors)} invalid records.")
+
+        person_ids = None
+        if valid:
+            async with self._writer():
+                first_person_id = await self._offload(self.io_executor, self._next_person_id)
+
+                rows = [self._build_row(data, first_person_id + i) for i, data in enumerate(valid)]
+                await self._offload(self.io_executor, self._append_rows, rows)
+                person_ids = [first_person_id, first_person_id + len(rows) - 1]
+                self.logger.info(f"Batch of {len(rows)} rows appended to storage.")
+
+        return {
+            "message": "Batch processed.",
+            "submitted": len(valid),
+            "failed": len(errors),
+            "person_ids": person_ids,
+            "errors": errors
+        }
+
+    async def get_data(self, limit: int) -> Dict[str, Any]:
+        """
+        Preview the dataset from the in-memory copy.
 
-        df: pd.DataFrame = pd.read_csv(self.PATH)
+        Args:
+            limit (int): Number of rows to return.
 
-        last_person_id = df["Person ID"].max()
-        new_person_id = int(last_person_id + 1 if pd.notnull(last_person_id) else 1)
+        Returns:
+            Dict[str, Any]: Row count, the data version and the first rows.
+        """
+        try:
+            df = await self._offload(self.io_executor, self.data_cache.get)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+        preview = df.head(limit).astype(object).where(df.head(limit).notna(), None)
+        return {
+            "rows": len(df),
+            "data_version": self.data_version,
+            "data": preview.to_dict(orient='records')
+        }
 
-        new_data: Dict[str, Any] = {
-            "Person ID": new_person_id,
+    async def get_aggregates(self, rebuild: bool = False) -> Dict[str, Any]:
+        """
+        Serve the statistics the charts are drawn from, so clients do not have to
+        load and group the dataset themselves.
+
+        Args:
+            rebuild (bool, optional): Recompute them from the whole dataset. Defaults to False.
+
+        Returns:
+            Dict[str, Any]: The data version and the aggregates.
+        """
+        try:
+            aggregates = await self._offload(self.io_executor, self._current_aggregates, rebuild)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        with self._aggregates_lock:
+            serialized = aggregates.to_dict()
+        return {"data_version": self.data_version, **serialized}
+
+    def _current_aggregates(self, rebuild: bool = False) -> DatasetAggregates:
+        """
+        Aggregates of the stored dataset. Rows appended by other processes are
+        read from storage and added row by row. They are recomputed from the
+        cached frame only when the storage changed in another way (e.g. by a
+        clean), or when a rebuild is requested.
+        """
+        with self._aggregates_refresh_lock:
+            while True:
+                with self._aggregates_lock:
+                    aggregates, mark = self._aggregates, self._aggregates_mark
+                if not rebuild and aggregates is not None and mark == self.storage.mark():
+                    return aggregates
+
+                appended = None if rebuild or aggregates is None else self.storage.read_since_with_mark(mark)
+                if appended is None:
+                    frame, frame_mark = self.data_cache.get_with_mark()
+                    rebuilt = DatasetAggregates.from_frame(frame)
+                    with self._aggregates_lock:
+                        self._aggregates, self._aggregates_mark = rebuilt, frame_mark
+                    self.logger.info(f"Aggregates rebuilt from {rebuilt.rows} rows.")
+                    rebuild = False
+                    continue
+
+                rows, new_mark = appended
+                with self._aggregates_lock:
+                    # a writer may have added its rows meanwhile, then read again from there
+                    if self._aggregates is aggregates and self._aggregates_mark == mark:
+                        aggregates.add_rows(rows.to_dict(orient='records'))
+                        self._aggregates_mark = new_mark
+
+    def _update_aggregates(self, rows: List[Dict[str, Any]], before: Hashable, after: Hashable) -> None:
+        """
+        Add appended rows to the aggregates if they were up to date before the append.
+        """
+        with self._aggregates_lock:
+            if self._aggregates is not None and self._aggregates_mark == before:
+                self._aggregates.add_rows(rows)
+                self._aggregates_mark = after
+
+    def _append_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Append rows to storage and apply them to the cached frame, aggregates and
+        Person ID sequence. Blocking, called with the write lock held.
+        """
+        before = self.storage.mark()
+        self.storage.append(rows)
+        after = self.storage.mark()
+        self._last_person_id = max(row["Person ID"] for row in rows)
+        self._sequence_mark = after
+        self.data_cache.appended(rows, before, after)
+        self._update_aggregates(rows, before, after)
+
+    @staticmethod
+    def _build_row(data: FormData, person_id: int) -> Dict[str, Any]:
+        """
+        Convert validated form data into a dataset row.
+
+        Args:
+            data (FormData): The validated form data.
+            person_id (int): Person ID assigned to the row.
+
+        Returns:
+            Dict[str, Any]: The row keyed by column name.
+        """
+        return {
+            "Person ID": person_id,
             "Gender": data.gender,
             "Age": data.age,
             "Occupation": data.occupation,
@@ -128,19 +597,6 @@ class SleepDataBackend:
             "Physical Activity Level": data.physical_activity_level,
             "Stress Level": data.stress_level
         }
-        self.logger.info(f"Prepared new data entry: {new_data}")
-
-        ordered_columns = [
-            "Person ID", "Gender", "Age", "Occupation", 
-            "Sleep Duration", "Quality of Sleep", 
-            "Physical Activity Level", "Stress Level"
-        ]
-
-        df = pd.concat([df, pd.DataFrame([new_data], columns=ordered_columns)], ignore_index=True)
-        df.to_csv(self.PATH, index=False)
-        self.logger.info("New data appended and CSV updated.")
-
-        return {"message": "Data taken successfully!", "data": new_data}
 
     async def predict_stress(self,
                               gender: str,
@@ -150,30 +606,171 @@ class SleepDataBackend:
                               quality_of_sleep: float,
                               physical_activity_level: float) -> Dict[str, Any]:
         """
-        Easy logic for calculating average stress level on users data.
+        Predict the stress level for the given features. The input row is built
+        from the query parameters, the dataset is not read.
         """
-        if self.model is None:
+        active = self.registry.active
+        if active is None:
             raise HTTPException(status_code=500, detail="Model is not loaded.")
-        
-        df = pd.read_csv(self.PATH)
-        
-        input_df = df.tail(1)
-        
+
+        features = self._build_features(gender, age, occupation,
+                                        sleep_duration, quality_of_sleep, physical_activity_level)
+        key = (active.version, *features.values())
+
+        cached = self.prediction_cache.get(key)
+        if cached is not None:
+            return {"predicted_stress_level": cached}
+
         try:
-            prediction = self.model.predict(input_df)[0]
-            return {"predicted_stress_level": float(prediction)}
+            prediction = await self.prediction_batcher.submit(features)
+            self.prediction_cache.put(key, prediction)
+            return {"predicted_stress_level": prediction}
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Too many pending predictions.", headers={"Retry-After": "1"})
         except Exception as e:
             self.logger.error(f"Error during prediction: {e}")
-            raise HTTPException(status_code=500, detail={e})
-        
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def predict_stress_batch(self, rows: List[PredictionData]) -> Dict[str, Any]:
+        """
+        Predict stress levels for many feature rows. Cached rows are looked up,
+        the rest are scored with a single model call.
+
+        Args:
+            rows (List[PredictionData]): Feature rows to score.
+
+        Returns:
+            Dict[str, Any]: Predictions in the same order as the input rows.
+        """
+        active = self.registry.active
+        if active is None:
+            raise HTTPException(status_code=500, detail="Model is not loaded.")
+        if not rows:
+            return {"predicted_stress_levels": []}
+
+        features = [
+            self._build_features(row.gender, row.age, row.occupation,
+                                 row.sleep_duration, row.quality_of_sleep, row.physical_activity_level)
+            for row in rows
+        ]
+        keys = [(active.version, *row.values()) for row in features]
+
+        predictions = [self.prediction_cache.get(key) for key in keys]
+        missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+
+        try:
+            if missing:
+                computed = await self._offload(
+                    self.io_executor, self._predict_rows, [features[i] for i in missing]
+                )
+                for i, prediction in zip(missing, computed):
+                    predictions[i] = prediction
+                    self.prediction_cache.put(keys[i], prediction)
+            return {"predicted_stress_levels": predictions}
+        except HTTPException:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error during batch prediction: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @staticmethod
+    def _build_features(gender: str,
+                        age: float,
+                        occupation: str,
+                        sleep_duration: float,
+                        quality_of_sleep: float,
+                        physical_activity_level: float) -> Dict[str, Any]:
+        """
+        Map prediction arguments to the dataset column names used in training.
+        Values are normalized to the resolution of the form inputs (whole years,
+        0.1 hours, integer scores), which also makes them a stable cache key.
+        """
+        return {
+            "Gender": gender.strip(),
+            "Age": int(round(age)),
+            "Occupation": occupation.strip(),
+            "Sleep Duration": round(float(sleep_duration), 1),
+            "Quality of Sleep": int(round(quality_of_sleep)),
+            "Physical Activity Level": int(round(physical_activity_level))
+        }
+
+    def _predict_rows(self, features: List[Dict[str, Any]]) -> List[float]:
+        """
+        Run the model once over a list of feature rows. Called from worker threads.
+
+        Args:
+            features (List[Dict[str, Any]]): Feature rows keyed by column name.
+
+        Returns:
+            List[float]: One prediction per row.
+        """
+        return self.model.predict(self._feature_frame(features)).astype(float).tolist()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Collect runtime metrics of the backend.
+
+        Returns:
+            Dict[str, Any]: Metrics grouped by component.
+        """
+        return {
+            "prediction_batcher": self.prediction_batcher.metrics(),
+            "prediction_cache": self.prediction_cache.metrics(),
+            "io_executor": self.io_executor.metrics(),
+            "cpu_executor": self.cpu_executor.metrics(),
+            "data_cache": self.data_cache.metrics(),
+            "file_lock": self.file_lock.metrics()
+        }
+
+    def _feature_frame(self, features: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Build the model input frame with columns in the order the pipeline was fitted on.
+
+        Args:
+            features (List[Dict[str, Any]]): Feature rows keyed by column name.
+
+        Returns:
+            pd.DataFrame: Frame ready to be passed to the model.
+        """
+        return pd.DataFrame(features, columns=list(self.model.feature_names_in_))
 
     def run(self) -> None:
         """
-        Run the FastAPI application using uvicorn.
+        Run the FastAPI application using uvicorn in this process.
         """
-        uvicorn.run(self.app, host='0.0.0.0', port=8000)
+        uvicorn.run(self.app, host=cfg.BACKEND_HOST, port=cfg.BACKEND_PORT)
+
+
+def create_app() -> FastAPI:
+    """
+    Application factory for multi-worker mode. Every worker process builds its
+    own backend; they share the dataset through the storage and the write file
+    lock, and the model through the memory-mapped compact artifact.
+
+    Returns:
+        FastAPI: The application of one worker.
+    """
+    return SleepDataBackend(engine=cfg.WORKER_PREDICT_ENGINE).app
+
+
+def run_workers(workers: int) -> None:
+    """
+    Run the backend in several uvicorn worker processes sharing one port.
+
+    Args:
+        workers (int): Number of worker processes.
+    """
+    uvicorn.run('backend:create_app', factory=True, host=cfg.BACKEND_HOST, port=cfg.BACKEND_PORT, workers=workers)
 
 
 if __name__ == '__main__':
-    backend = SleepDataBackend()
-    backend.run()
+    parser = argparse.ArgumentParser(description="Run the backend API.")
+    parser.add_argument('--workers', type=int, default=cfg.BACKEND_WORKERS,
+                        help="number of worker processes, more than one uses the app factory")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_workers(args.workers)
+    else:
+        backend = SleepDataBackend()
+        backend.run()
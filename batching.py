@@ -0,0 +1,132 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class MicroBatcher:
+    """
+    MicroBatcher collects items submitted by concurrent coroutines and processes
+    them with one vectorized call:
+    - A batch is closed when the time window expires or the batch is full.
+    - The batch function runs in a worker thread, so the event loop stays free.
+    - The queue is bounded; submitting to a full queue fails at once.
+    - Every caller receives the result that belongs to its own item.
+    """
+
+    def __init__(self,
+                 process_batch: Callable[[List[Any]], Sequence[Any]],
+                 window_ms: float,
+                 max_batch_size: int,
+                 max_queue_size: int = 0,
+                 executor: Optional[Executor] = None) -> None:
+        """
+        Initialize the batcher.
+
+        Args:
+            process_batch (Callable[[List[Any]], Sequence[Any]]): Function that maps a list
+                of items to a sequence of results of the same length.
+            window_ms (float): How long to wait for more items after the first one.
+            max_batch_size (int): Maximum number of items processed in one call.
+            max_queue_size (int, optional): Maximum number of waiting items. Defaults to 0 (unbounded).
+            executor (Optional[Executor], optional): Pool the batch function runs in.
+                Defaults to None (the loop's default executor).
+        """
+        self.process_batch = process_batch
+        self.window: float = window_ms / 1000
+        self.max_batch_size: int = max_batch_size
+        self.max_queue_size: int = max_queue_size
+        self.executor: Optional[Executor] = executor
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches: int = 0
+        self.items: int = 0
+        self.last_batch_size: int = 0
+        self.largest_batch_size: int = 0
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item (Any): The item to process.
+
+        Raises:
+            asyncio.QueueFull: If max_queue_size items are already waiting.
+
+        Returns:
+            Any: The result produced for this item.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # (re)start the worker on the loop that is serving requests
+            self._loop = loop
+            self._queue = asyncio.Queue(self.max_queue_size)
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _run(self) -> None:
+        """
+        Worker loop: gather a batch and process it, forever.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """
+        Process one batch in a worker thread and resolve the callers' futures.
+
+        Args:
+            batch (List[Tuple[Any, asyncio.Future]]): Items with their futures.
+        """
+        self.batches += 1
+        self.items += len(batch)
+        self.last_batch_size = len(batch)
+        self.largest_batch_size = max(self.largest_batch_size, len(batch))
+
+        items = [item for item, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.process_batch, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report queue depth and batch size statistics.
+
+        Returns:
+            Dict[str, Any]: Current metrics.
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": self.items / self.batches if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "largest_batch_size": self.largest_batch_size
+        }
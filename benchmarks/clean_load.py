@@ -0,0 +1,110 @@
+"""
+Load test for the event loop while a clean runs.
+
+Two clients call /api/ and /api/predict_stress/ in a loop while a full clean job
+runs on the backend, and the latencies before and during the clean are compared.
+If the clean blocked the event loop, both probes would stall for its whole duration.
+
+Point PATH in .env at a large dataset (e.g. the bundled one repeated to ~1M rows)
+and delete its .clean.json file, so the job has to check every row:
+
+    python3 backend.py
+    python3 benchmarks/clean_load.py
+"""
+import time
+import argparse
+import statistics
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+
+PREDICT_PARAMS: Dict[str, Any] = dict(gender='Male', age=30, occupation='Doctor', sleep_duration=7.0,
+                                      quality_of_sleep=6, physical_activity_level=50)
+
+
+class Probe(threading.Thread):
+    """
+    Calls one endpoint every interval and records (phase, latency) pairs.
+    """
+
+    def __init__(self, url: str, params: Optional[Dict[str, Any]], interval: float, phase: List[str]) -> None:
+        super().__init__(daemon=True)
+        self.url: str = url
+        self.params = params
+        self.interval: float = interval
+        self.phase: List[str] = phase
+        self.latencies: List[Tuple[str, float]] = []
+        self.errors: int = 0
+        self.stopped: bool = False
+
+    def run(self) -> None:
+        session = requests.Session()
+        i = 0
+        while not self.stopped:
+            params = None
+            if self.params is not None:
+                # vary the input so the prediction cache does not answer
+                i += 1
+                params = {**self.params, 'age': 18 + i % 40, 'sleep_duration': 5 + (i % 31) / 10}
+            phase = self.phase[0]
+            start = time.perf_counter()
+            try:
+                if session.get(self.url, params=params, timeout=120).status_code != 200:
+                    self.errors += 1
+            except requests.exceptions.RequestException:
+                self.errors += 1
+            self.latencies.append((phase, time.perf_counter() - start))
+            time.sleep(self.interval)
+
+
+def run_clean(url: str) -> Dict[str, Any]:
+    """
+    Schedule a clean job and wait until it finished.
+    """
+    job = requests.post(f"{url}/api/clean_data/", timeout=30).json()
+    while job['status'] in ('queued', 'running'):
+        time.sleep(0.1)
+        job = requests.get(f"{url}/api/clean_data/", timeout=30).json()
+    return job
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure request latency while the backend cleans the dataset.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="backend address")
+    parser.add_argument('--interval', type=float, default=0.02, help="seconds between probe requests")
+    parser.add_argument('--idle', type=float, default=2.0, help="seconds measured before the clean")
+    args = parser.parse_args()
+
+    phase = ['idle']
+    probes = {
+        '/api/': Probe(f"{args.url}/api/", None, args.interval, phase),
+        '/api/predict_stress/': Probe(f"{args.url}/api/predict_stress/", PREDICT_PARAMS, args.interval, phase)
+    }
+    for probe in probes.values():
+        probe.start()
+
+    time.sleep(args.idle)
+    phase[0] = 'clean'
+    start = time.perf_counter()
+    job = run_clean(args.url)
+    duration = time.perf_counter() - start
+    for probe in probes.values():
+        probe.stopped = True
+        probe.join()
+
+    print(f"clean job {job['status']} in {duration:.2f}s: "
+          f"{job['rows_processed']} rows processed, {job['rows_removed']} removed")
+    for name, probe in probes.items():
+        for phase_name in ('idle', 'clean'):
+            latencies = sorted(latency for p, latency in probe.latencies if p == phase_name)
+            if not latencies:
+                continue
+            print(f"{name:22s} {phase_name:5s} n={len(latencies):4d} "
+                  f"p50={statistics.median(latencies) * 1000:7.1f}ms max={max(latencies) * 1000:7.1f}ms")
+        print(f"{name:22s} errors={probe.errors}")
+
+
+if __name__ == '__main__':
+    main()
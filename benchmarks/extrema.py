@@ -0,0 +1,82 @@
+"""
+Local extrema detection, the former per-series Python loop versus Utils.local_extrema.
+
+Random series are generated in the shapes of the chart groupings (per age,
+per age and occupation) and larger, both implementations are timed and their
+results compared. The vectorized utility is also timed with smoothing and a
+prominence threshold, which the loop did not support.
+
+    python3 benchmarks/extrema.py
+"""
+import os
+import sys
+import time
+import argparse
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import Utils
+
+
+SHAPES: List[Tuple[str, int, int]] = [
+    ('per age', 11, 33),
+    ('per age x occupation', 473, 60),
+    ('thousands of points', 1000, 5000)
+]
+
+
+def fnd(values: List[float]) -> Tuple[List[int], List[int]]:
+    # the helper generate_average_chart used before, one series per call
+    peaks = []
+    downs = []
+    mx = max(values)
+    mn = min(values)
+    for i in range(1, len(values) - 1):
+        if values[i] > values[i - 1] and values[i] > values[i + 1] and values[i] != mx:
+            peaks.append(i)
+        elif values[i] < values[i - 1] and values[i] < values[i + 1] and values[i] != mn:
+            downs.append(i)
+    return downs, peaks
+
+
+def best_of(function: Callable[[], object], repeat: int) -> float:
+    """
+    Fastest of several runs, in milliseconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the loop and vectorized local extrema.")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement, the fastest is kept")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'grouping':22s} {'series x points':>16s} {'loop':>10s} {'vectorized':>11s} "
+          f"{'smoothed':>10s} {'same':>5s}")
+    for name, n_series, n_points in SHAPES:
+        series = rng.normal(size=(n_series, n_points)).cumsum(axis=1)
+        rows = [list(row) for row in series]
+
+        loop_ms = best_of(lambda: [fnd(row) for row in rows], args.repeat)
+        vectorized_ms = best_of(lambda: Utils.local_extrema(series), args.repeat)
+        smoothed_ms = best_of(lambda: Utils.local_extrema(series, smooth=5, prominence=0.5), args.repeat)
+
+        minima, maxima = Utils.local_extrema(series)
+        same = all(
+            (list(np.flatnonzero(minima[i])), list(np.flatnonzero(maxima[i]))) == fnd(rows[i])
+            for i in range(n_series)
+        )
+        print(f"{name:22s} {f'{n_series} x {n_points}':>16s} {loop_ms:8.2f}ms {vectorized_ms:9.2f}ms "
+              f"{smoothed_ms:8.2f}ms {str(same):>5s}")
+
+
+if __name__ == '__main__':
+    main()
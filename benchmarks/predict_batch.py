@@ -0,0 +1,72 @@
+"""
+Scoring throughput, one row per request versus one batch request.
+
+Random feature rows are scored one by one through /api/predict_stress/ and in
+one /api/predict_stress_batch/ call, and the rows per second are compared.
+Each mode gets its own rows, so the prediction cache does not answer; the
+per-row predictions are then checked against a batch call on the same rows.
+
+    python3 backend.py
+    python3 benchmarks/predict_batch.py --rows 1000
+"""
+import time
+import random
+import argparse
+from typing import Any, Dict, List, Tuple
+
+import requests
+
+
+def feature_rows(count: int) -> List[Dict[str, Any]]:
+    return [dict(gender=random.choice(['Male', 'Female']), age=random.randint(18, 80),
+                 occupation=random.choice(['Doctor', 'Nurse', 'Engineer', 'Teacher']),
+                 sleep_duration=round(random.uniform(4, 10), 2), quality_of_sleep=random.randint(1, 10),
+                 physical_activity_level=random.randint(0, 100))
+            for _ in range(count)]
+
+
+def per_row(url: str, rows: List[Dict[str, Any]]) -> Tuple[float, List[float]]:
+    """
+    Score every row in its own request, return the seconds taken and the predictions.
+    """
+    session = requests.Session()
+    predictions = []
+    start = time.perf_counter()
+    for row in rows:
+        response = session.get(f"{url}/api/predict_stress/", params=row, timeout=60)
+        response.raise_for_status()
+        predictions.append(response.json()['predicted_stress_level'])
+    return time.perf_counter() - start, predictions
+
+
+def batch(url: str, rows: List[Dict[str, Any]]) -> Tuple[float, List[float]]:
+    """
+    Score all rows in one request, return the seconds taken and the predictions.
+    """
+    start = time.perf_counter()
+    response = requests.post(f"{url}/api/predict_stress_batch/", json=rows, timeout=600)
+    response.raise_for_status()
+    return time.perf_counter() - start, response.json()['predicted_stress_levels']
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare single and batched scoring throughput.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="backend address")
+    parser.add_argument('--rows', type=int, default=1000, help="rows scored per mode")
+    args = parser.parse_args()
+
+    single_rows = feature_rows(args.rows)
+    single_seconds, single_predictions = per_row(args.url, single_rows)
+    batch_seconds, _ = batch(args.url, feature_rows(args.rows))
+    _, check = batch(args.url, single_rows)
+
+    print(f"{'/api/predict_stress/ per row':30s} {args.rows} rows in {single_seconds:7.3f}s "
+          f"{args.rows / single_seconds:10.1f} rows/s")
+    print(f"{'/api/predict_stress_batch/':30s} {args.rows} rows in {batch_seconds:7.3f}s "
+          f"{args.rows / batch_seconds:10.1f} rows/s")
+    print(f"speedup {single_seconds / batch_seconds:.0f}x, "
+          f"predictions identical: {check == single_predictions}")
+
+
+if __name__ == '__main__':
+    main()
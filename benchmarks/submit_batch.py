@@ -0,0 +1,74 @@
+"""
+Submission throughput, one record per request versus one batch request.
+
+The same number of records is sent one by one to /api/submit/ and then in one
+/api/submit_batch/ call, as a JSON array and as an NDJSON body, and the rows
+per second are compared. Every record is appended to the dataset in .env, so
+point PATH at a copy:
+
+    python3 backend.py
+    python3 benchmarks/submit_batch.py --records 1000
+"""
+import json
+import time
+import random
+import argparse
+from typing import Any, Dict, List
+
+import requests
+
+
+def records(count: int) -> List[Dict[str, Any]]:
+    return [dict(gender=random.choice(['Male', 'Female']), age=random.randint(18, 80), occupation='Doctor',
+                 sleep_duration=round(random.uniform(4, 10), 1), quality_of_sleep=random.randint(1, 10),
+                 physical_activity_level=random.randint(0, 100), stress_level=random.randint(1, 10))
+            for _ in range(count)]
+
+
+def per_row(url: str, rows: List[Dict[str, Any]]) -> float:
+    """
+    Submit every record in its own request, return the seconds taken.
+    """
+    session = requests.Session()
+    start = time.perf_counter()
+    for row in rows:
+        session.post(f"{url}/api/submit/", json=row, timeout=60).raise_for_status()
+    return time.perf_counter() - start
+
+
+def batch(url: str, rows: List[Dict[str, Any]], ndjson: bool) -> float:
+    """
+    Submit all records in one request, return the seconds taken.
+    """
+    start = time.perf_counter()
+    if ndjson:
+        body = ''.join(json.dumps(row) + '\n' for row in rows)
+        response = requests.post(f"{url}/api/submit_batch/", data=body.encode('utf-8'),
+                                 headers={'Content-Type': 'application/x-ndjson'}, timeout=600)
+    else:
+        response = requests.post(f"{url}/api/submit_batch/", json=rows, timeout=600)
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    result = response.json()
+    if result['submitted'] != len(rows):
+        raise RuntimeError(f"{result['failed']} records were rejected: {result['errors'][:3]}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-row and batch submission throughput.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="backend address")
+    parser.add_argument('--records', type=int, default=1000, help="records submitted per mode")
+    args = parser.parse_args()
+
+    results = {
+        '/api/submit/ per row': per_row(args.url, records(args.records)),
+        '/api/submit_batch/ JSON': batch(args.url, records(args.records), ndjson=False),
+        '/api/submit_batch/ NDJSON': batch(args.url, records(args.records), ndjson=True)
+    }
+    for name, seconds in results.items():
+        print(f"{name:28s} {args.records} records in {seconds:7.3f}s {args.records / seconds:10.1f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
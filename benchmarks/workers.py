@@ -0,0 +1,146 @@
+"""
+Throughput of the backend by number of worker processes.
+
+For every worker count the backend is started with "backend.py --workers N",
+each endpoint is loaded by concurrent clients for a fixed time and the
+requests per second are printed as a table. With --writes, submissions are
+measured as well, alone and mixed with aggregate reads; they append rows to
+the dataset in .env.
+
+Run it from the directory holding .env, with no backend running:
+
+    python3 benchmarks/workers.py --workers 1 2 4
+
+Needs httpx. Workers only add throughput when there are free cores, the
+load generator itself uses one.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import data.cfg as cfg
+
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend.py')
+
+
+def predict_params() -> Dict[str, Any]:
+    # random inputs so the prediction cache rarely answers
+    return dict(gender=random.choice(['Male', 'Female']), age=random.randint(18, 80), occupation='Doctor',
+                sleep_duration=round(random.uniform(4, 10), 1), quality_of_sleep=random.randint(1, 10),
+                physical_activity_level=random.randint(0, 100))
+
+
+def form() -> Dict[str, Any]:
+    return dict(gender='Male', age=random.randint(18, 80), occupation='Doctor', sleep_duration=7.0,
+                quality_of_sleep=6, physical_activity_level=50, stress_level=5)
+
+
+# name -> list of (method, path, params or json factory); a scenario cycles through its requests
+Request = Tuple[str, str, Optional[Callable[[], Dict[str, Any]]]]
+SCENARIOS: Dict[str, List[Request]] = {
+    'root': [('GET', '/api/', None)],
+    'data': [('GET', '/api/data/', lambda: {'limit': 5})],
+    'aggregates': [('GET', '/api/aggregates/', None)],
+    'predict': [('GET', '/api/predict_stress/', predict_params)]
+}
+WRITE_SCENARIOS: Dict[str, List[Request]] = {
+    'submit': [('POST', '/api/submit/', form)],
+    'submit+aggregates': [('POST', '/api/submit/', form), ('GET', '/api/aggregates/', None)]
+}
+
+
+async def load(url: str, requests: List[Request], seconds: float, concurrency: int) -> Tuple[float, int]:
+    """
+    Send the requests from concurrent clients for a number of seconds.
+
+    Returns:
+        Tuple[float, int]: Successful requests per second and failed requests.
+    """
+    done, failed = 0, 0
+    stop = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        async def worker(offset: int) -> None:
+            nonlocal done, failed
+            i = offset
+            while time.perf_counter() < stop:
+                method, path, make = requests[i % len(requests)]
+                i += 1
+                payload = make() if make is not None else None
+                if method == 'GET':
+                    response = await client.get(path, params=payload)
+                else:
+                    response = await client.post(path, json=payload)
+                if response.status_code == 200:
+                    done += 1
+                else:
+                    failed += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(i) for i in range(concurrency)])
+        return done / (time.perf_counter() - start), failed
+
+
+def start_backend(workers: int, url: str) -> subprocess.Popen:
+    """
+    Start the backend and wait until it answers.
+    """
+    process = subprocess.Popen([sys.executable, BACKEND, '--workers', str(workers)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.perf_counter() + 120
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"{url}/api/", timeout=1).status_code == 200:
+                # let every worker finish loading the model
+                time.sleep(2 * workers)
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("The backend did not start.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure backend requests/second by number of workers.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help="worker counts to compare")
+    parser.add_argument('--seconds', type=float, default=8.0, help="measured seconds per endpoint")
+    parser.add_argument('--concurrency', type=int, default=32, help="concurrent client connections")
+    parser.add_argument('--writes', action='store_true', help="also measure submissions (appends to the dataset)")
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{cfg.BACKEND_PORT}"
+    scenarios = {**SCENARIOS, **(WRITE_SCENARIOS if args.writes else {})}
+    results: Dict[int, Dict[str, float]] = {}
+
+    for workers in args.workers:
+        process = start_backend(workers, url)
+        try:
+            results[workers] = {}
+            for name, requests in scenarios.items():
+                asyncio.run(load(url, requests, 1.0, args.concurrency))  # warm up
+                rps, failed = asyncio.run(load(url, requests, args.seconds, args.concurrency))
+                results[workers][name] = rps
+                print(f"{workers} workers {name:18s} {rps:8.1f} req/s" + (f" ({failed} failed)" if failed else ""),
+                      flush=True)
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"\nrequests/second, {args.concurrency} clients, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8s}" + ''.join(f"{name:>19s}" for name in scenarios))
+    for workers, row in results.items():
+        print(f"{workers:8d}" + ''.join(f"{row[name]:19.1f}" for name in scenarios))
+
+
+if __name__ == '__main__':
+    main()
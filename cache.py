@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """
+    LRUCache is a bounded, thread-safe key-value cache:
+    - The least recently used entry is evicted when the cache is full.
+    - Entries older than the TTL are treated as missing.
+    - Hits, misses and evictions are counted.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries.
+            ttl (Optional[float], optional): Entry lifetime in seconds. Defaults to None (no expiry).
+        """
+        self.maxsize: int = maxsize
+        self.ttl: Optional[float] = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a key and mark it as recently used.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any, optional): Value returned on a miss. Defaults to None.
+
+        Returns:
+            Any: The cached value or the default.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._data[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if needed.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drop all entries. Counters are kept.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report cache size and hit/miss counters.
+
+        Returns:
+            Dict[str, Any]: Current metrics.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
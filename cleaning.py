@@ -0,0 +1,249 @@
+import os
+import json
+import logging
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from storage import DataStorage, open_storage
+import data.cfg as cfg
+
+
+logger = logging.getLogger(__name__)
+
+
+def columns_to_delete() -> List[str]:
+    """
+    Columns dropped by cleaning, from configuration.
+    """
+    return [col.strip().strip('"').strip("'") for col in cfg.COLUMNS_TO_DELETE]
+
+
+def load_clean_state(path: str) -> Tuple[Optional[Hashable], Optional[List[str]]]:
+    """
+    Load the storage mark after the last clean and the numeric columns it found.
+    The state is kept in a file so all backend processes share it.
+
+    Args:
+        path (str): Location of the dataset.
+
+    Returns:
+        Tuple[Optional[Hashable], Optional[List[str]]]: The clean mark and numeric
+        columns, both None if the dataset was never cleaned.
+    """
+    state = _read_json(f"{path}.clean.json")
+    if state is None:
+        return None, None
+    # marks are tuples, JSON stores them as lists
+    return tuple(state['mark']), state['numeric_cols']
+
+
+def save_clean_state(path: str, mark: Hashable, numeric_cols: Optional[List[str]]) -> None:
+    """
+    Record the storage mark after a clean. Called with the write lock held.
+
+    Args:
+        path (str): Location of the dataset.
+        mark (Hashable): Storage mark after the clean.
+        numeric_cols (Optional[List[str]]): Numeric columns of the dataset.
+    """
+    _write_json(f"{path}.clean.json", {'mark': list(mark), 'numeric_cols': numeric_cols})
+
+
+def load_clean_job(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the status of the last scheduled clean job. It is kept in a file so
+    every backend process reports the same job.
+
+    Args:
+        path (str): Location of the dataset.
+
+    Returns:
+        Optional[Dict[str, Any]]: The job status, None if no job was scheduled.
+    """
+    return _read_json(f"{path}.clean_job.json")
+
+
+def save_clean_job(path: str, job: Dict[str, Any]) -> None:
+    """
+    Record the status of a clean job.
+
+    Args:
+        path (str): Location of the dataset.
+        job (Dict[str, Any]): The job status.
+    """
+    _write_json(f"{path}.clean_job.json", job)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_json(path: str, content: Dict[str, Any]) -> None:
+    # written to a temporary file and renamed, readers never see a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(content, f)
+    os.replace(tmp_path, path)
+
+
+def clean_storage(path: str,
+                  clean_mark: Optional[Hashable] = None,
+                  numeric_cols: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Clean the stored dataset. Only module-level state is used, so it can run in
+    a worker process.
+
+    Cleaning is incremental: if the data only grew since clean_mark, only the
+    appended rows are checked and replaced. Engines that clean by themselves
+    (SQL) do it in place. Nothing is written when the data is already clean.
+    Afterwards the storage is compacted if appends left it in too many files.
+
+    Args:
+        path (str): Location of the dataset.
+        clean_mark (Optional[Hashable], optional): Storage mark after the previous
+            clean. Defaults to None (check all rows).
+        numeric_cols (Optional[List[str]], optional): Numeric columns found by the
+            previous full clean. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: changed, compacted, rows_checked, rows_removed, the new
+        storage mark and the numeric columns.
+    """
+    storage = open_storage(path)
+    if clean_mark is not None and len(clean_mark) != len(storage.mark()):
+        # recorded in an older mark format, check all rows
+        clean_mark = None
+
+    result = _clean_rows(storage, clean_mark, numeric_cols)
+    result['compacted'] = storage.compact()
+    if result['compacted']:
+        logger.info('Storage compacted.')
+    # compaction changes the mark but not the rows
+    result['mark'] = storage.mark()
+    return result
+
+
+def _clean_rows(storage: DataStorage,
+                clean_mark: Optional[Hashable],
+                numeric_cols: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Apply the cleaning rules to the storage, in the engine, to the appended rows
+    only or to all rows.
+    """
+    result = storage.clean(columns_to_delete(), since=clean_mark)
+    if result is not None:
+        return {**result, 'numeric_cols': numeric_cols}
+
+    if clean_mark is not None:
+        appended = storage.read_since(clean_mark)
+        if appended is not None:
+            return _clean_appended(storage, clean_mark, appended, numeric_cols)
+
+    df: pd.DataFrame = storage.read()
+    rows_checked = len(df)
+    logger.info('Original data loaded.')
+
+    df, changed = clean_frame(df)
+
+    if changed:
+        storage.write(df)
+        logger.info('Changes saved to storage.')
+    else:
+        logger.info('Data was already clean, nothing written.')
+
+    return {
+        'changed': changed,
+        'numeric_cols': list(df.select_dtypes(include=[np.number]).columns),
+        'rows_checked': rows_checked,
+        'rows_removed': rows_checked - len(df)
+    }
+
+
+def _clean_appended(storage: DataStorage,
+                    clean_mark: Hashable,
+                    appended: pd.DataFrame,
+                    numeric_cols: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Clean only the rows appended since the last clean. If any of them change,
+    they are replaced in storage; everything before them is left untouched.
+    Duplicate Person IDs are only looked for among the appended rows, the
+    backend assigns new rows higher IDs than all stored ones.
+    """
+    rows_checked = len(appended)
+    df, changed = clean_frame(appended, numeric_cols)
+
+    if changed:
+        storage.replace_since(clean_mark, df)
+        logger.info(f'{rows_checked - len(df)} of {rows_checked} new rows removed.')
+    else:
+        logger.info(f'{rows_checked} new rows are clean, nothing written.')
+
+    return {
+        'changed': changed,
+        'numeric_cols': numeric_cols,
+        'rows_checked': rows_checked,
+        'rows_removed': rows_checked - len(df)
+    }
+
+
+def clean_frame(df: pd.DataFrame, numeric_cols: Optional[List[str]] = None) -> Tuple[pd.DataFrame, bool]:
+    """
+    Apply the cleaning rules to a frame:
+    - Keeping only the last row of every Person ID.
+    - Removing rows with all NaN values.
+    - Removing rows where all numeric values are zero.
+    - Removing rows with an infinite numeric value.
+    - Dropping specified columns from configuration.
+
+    Args:
+        df (pd.DataFrame): The data to clean.
+        numeric_cols (Optional[List[str]], optional): Numeric columns. Defaults to None,
+            which detects them from the dtypes.
+
+    Returns:
+        Tuple[pd.DataFrame, bool]: The cleaned frame and whether anything changed.
+    """
+    original_shape = df.shape
+
+    # Drop duplicate Person IDs, the last submitted row wins
+    if 'Person ID' in df.columns:
+        df = df.drop_duplicates(subset='Person ID', keep='last')
+        logger.info('Duplicate Person IDs removed.')
+
+    # Drop rows with all NaN values
+    df = df.dropna(how='all')
+    logger.info('Rows with all NaN values removed.')
+
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+    else:
+        numeric_cols = [col for col in numeric_cols if col in df.columns]
+
+    # Keep rows that have at least one non-zero numeric value
+    # First, drop rows where all numeric values are NaN
+    df = df.dropna(subset=numeric_cols, how='all')
+    # Keep rows where at least one numeric column is not zero
+    df = df[(df[numeric_cols] != 0).any(axis=1)]
+    logger.info('Rows with all zeros in numeric columns removed.')
+
+    # Drop rows with an infinite numeric value
+    df = df[~df[numeric_cols].isin([np.inf, -np.inf]).any(axis=1)]
+    logger.info('Rows with infinite values removed.')
+
+    # Drop specified columns
+    df = df.drop(columns=columns_to_delete(), errors='ignore')
+    logger.info('Specified columns removed.')
+
+    # Removed empty rows may have turned integer columns into floats
+    for col in df.select_dtypes(include=['float']).columns:
+        values = df[col]
+        if values.notna().all() and (values == values.round()).all():
+            df[col] = values.astype('int64')
+
+    return df, df.shape != original_shape
@@ -1,11 +1,14 @@
 from pydantic import BaseModel
 
 
-class FormData(BaseModel):
+class PredictionData(BaseModel):
         gender: str
         age: int
         occupation: str
         sleep_duration: float
         quality_of_sleep: int
         physical_activity_level: int
+
+
+class FormData(PredictionData):
         stress_level: int
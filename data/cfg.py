@@ -2,4 +2,45 @@ COLUMNS_TO_DELETE: list[str] = ["BMI Category", "Blood Pressure", "Heart Rate",
 SUBMIT_URL: str = "http://127.0.0.1:8000/api/submit/"
 CLEAN_DATA_URL: str = "http://127.0.0.1:8000/api/clean_data/"
 PREDICT_URL: str = "http://127.0.0.1:8000/api/predict_stress/"
+SUBMIT_AND_PREDICT_URL: str = "http://127.0.0.1:8000/api/submit_and_predict/"
+AGGREGATES_URL: str = "http://127.0.0.1:8000/api/aggregates/"
 form_title: str = "Add your data!"
+PREDICT_BATCH_WINDOW_MS: float = 3.0
+PREDICT_MAX_BATCH_SIZE: int = 64
+PREDICTION_CACHE_SIZE: int = 4096
+PREDICTION_CACHE_TTL_S: float = 3600.0
+MODEL_REGISTRY_DIR: str = "models"
+MODEL_WATCH_INTERVAL_S: float = 5.0
+# "sklearn" unpickles the full pipeline, "numpy" serves the compact artifact,
+# which has lower per-call latency for small batches
+PREDICT_ENGINE: str = "sklearn"
+CATEGORICAL_COLUMNS: list[str] = ["Gender", "Occupation"]
+AGGREGATE_COLUMNS: list[str] = ["Sleep Duration", "Quality of Sleep", "Physical Activity Level", "Stress Level"]
+FIGURE_CACHE_SIZE: int = 64
+# (low, high, bins) of the spray chart histogram; the value axis is shared by
+# the spray columns, values outside the range are counted in the edge bins
+SPRAY_COLUMNS: list[str] = ["Sleep Duration", "Stress Level"]
+SPRAY_AGE_BINS: tuple = (18.0, 78.0, 60)
+SPRAY_VALUE_BINS: tuple = (0.0, 12.0, 30)
+API_CONNECT_TIMEOUT_S: float = 3.05
+API_READ_TIMEOUT_S: float = 30.0
+API_RETRIES: int = 3
+API_BACKOFF_S: float = 0.3
+API_POOL_SIZE: int = 10
+# needs httpx with the h2 package, see ApiClient.async_client
+API_HTTP2: bool = False
+# bounded pools for blocking work; calls beyond MAX_PENDING are answered with 503
+IO_WORKERS: int = 8
+IO_MAX_PENDING: int = 256
+CPU_WORKERS: int = 2
+CPU_MAX_PENDING: int = 4
+PREDICT_MAX_QUEUE_SIZE: int = 1024
+BACKEND_HOST: str = "0.0.0.0"
+BACKEND_PORT: int = 8000
+# more than one worker runs separate processes through backend.create_app
+BACKEND_WORKERS: int = 1
+# workers serve the memory-mapped compact model, so its pages are shared
+# between processes instead of each worker unpickling its own copy
+WORKER_PREDICT_ENGINE: str = "numpy"
+# parquet/feather datasets are merged into one part once appends left more parts
+ARROW_MAX_PARTS: int = 64
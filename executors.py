@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import functools
+from concurrent.futures import BrokenExecutor, Executor
+from typing import Any, Callable, Dict
+
+
+class ExecutorBusy(RuntimeError):
+    """
+    Raised when a pool already has as many calls pending as it accepts.
+    """
+
+
+class BoundedExecutor:
+    """
+    BoundedExecutor runs blocking calls in a thread or process pool so they do
+    not block the event loop:
+    - At most max_pending calls are running or waiting for a worker. Further
+      calls are rejected at once, so overload turns into fast errors instead of
+      an ever growing queue.
+    - A pool broken by a crashed worker process is replaced by a new one.
+    - Completed and rejected calls and the current load are counted.
+
+    run() must be called from the event loop thread.
+    """
+
+    def __init__(self, factory: Callable[[], Executor], max_pending: int, name: str) -> None:
+        """
+        Initialize the wrapper and create the pool.
+
+        Args:
+            factory (Callable[[], Executor]): Creates the thread or process pool.
+            max_pending (int): Maximum number of running and queued calls.
+            name (str): Name used in errors and metrics.
+        """
+        self.factory = factory
+        self.executor: Executor = factory()
+        self.logger = logging.getLogger(__name__)
+        self.max_pending: int = max_pending
+        self.name: str = name
+
+        self.pending: int = 0
+        self.completed: int = 0
+        self.rejected: int = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a call in the pool and wait for its result.
+
+        Args:
+            fn (Callable[..., Any]): The blocking function. For process pools it
+                and its arguments must be picklable.
+            *args (Any): Arguments of the function.
+
+        Raises:
+            ExecutorBusy: If max_pending calls are already pending.
+
+        Returns:
+            Any: The result of the call.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorBusy(f"The {self.name} pool is busy, try again later.")
+
+        self.pending += 1
+        executor = self.executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(fn, *args))
+        except BrokenExecutor:
+            if executor is self.executor:
+                self.logger.error(f"The {self.name} pool is broken, starting a new one.")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = self.factory()
+            raise
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        """
+        Stop the pool without waiting for running calls, queued calls are cancelled.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report the load of the pool.
+
+        Returns:
+            Dict[str, Any]: Current metrics.
+        """
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
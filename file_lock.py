@@ -0,0 +1,102 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, where only one process may write
+    fcntl = None
+
+
+class FileLock:
+    """
+    FileLock is an exclusive lock shared by every process that uses the same lock file:
+    - Built on flock, so the OS releases it when the holder exits or crashes.
+    - Every acquisition opens its own descriptor, so it also excludes other
+      threads and tasks of the same process.
+    - The async form polls without blocking the event loop and can be cancelled
+      while waiting without leaking the lock.
+
+    Without fcntl the lock does nothing and only a single process may write.
+    """
+
+    POLL_INTERVAL_S: float = 0.001
+    MAX_POLL_INTERVAL_S: float = 0.02
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the lock, the lock file is created on first use.
+
+        Args:
+            path (str): Path of the lock file.
+        """
+        self.path: str = path
+        self.acquisitions: int = 0
+        self.wait_seconds: float = 0.0
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """
+        Hold the lock for the duration of a with block, blocking until it is free.
+        """
+        fd = self._open()
+        try:
+            start = time.perf_counter()
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            self._acquired(start)
+            yield
+        finally:
+            self._close(fd)
+
+    @asynccontextmanager
+    async def hold_async(self) -> AsyncIterator[None]:
+        """
+        Hold the lock for the duration of an async with block, waiting for it
+        without blocking the event loop.
+        """
+        fd = self._open()
+        try:
+            start = time.perf_counter()
+            interval = self.POLL_INTERVAL_S
+            while fd is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(interval)
+                    interval = min(interval * 2, self.MAX_POLL_INTERVAL_S)
+            self._acquired(start)
+            yield
+        finally:
+            self._close(fd)
+
+    def _open(self) -> Any:
+        if fcntl is None:
+            return None
+        return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    @staticmethod
+    def _close(fd: Any) -> None:
+        # closing the descriptor releases the lock
+        if fd is not None:
+            os.close(fd)
+
+    def _acquired(self, start: float) -> None:
+        self.acquisitions += 1
+        self.wait_seconds += time.perf_counter() - start
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report how often the lock was taken and how long this process waited for it.
+
+        Returns:
+            Dict[str, Any]: Current metrics.
+        """
+        return {
+            "shared": fcntl is not None,
+            "acquisitions": self.acquisitions,
+            "wait_seconds": round(self.wait_seconds, 6)
+        }
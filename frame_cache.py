@@ -0,0 +1,196 @@
+import logging
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import pandas as pd
+
+from storage import DataStorage
+import data.cfg as cfg
+
+
+class DataFrameCache:
+    """
+    DataFrameCache holds one compacted in-memory copy of the stored dataset:
+    - Categorical columns use the category dtype and integer columns are downcast.
+    - Writers hand it their appended rows, which are queued and merged into the
+      frame on the next read, so a submission never copies the dataset.
+      A clean drops it.
+    - Rows appended by other processes are read from storage after the cached
+      mark and added the same way. It is reloaded in full only when the data
+      changed in another way, e.g. after a clean.
+    - Storage is read without holding the lock writers take, so a long reload
+      never delays a submission.
+    """
+
+    def __init__(self, storage: DataStorage) -> None:
+        """
+        Initialize an empty cache, the data is loaded on first use.
+
+        Args:
+            storage (DataStorage): The dataset storage.
+        """
+        self.storage: DataStorage = storage
+        self.logger = logging.getLogger(__name__)
+        self._frame: Optional[pd.DataFrame] = None
+        # rows appended by this process that are not merged into the frame yet
+        self._pending: List[Dict[str, Any]] = []
+        # storage mark of the frame with the pending rows
+        self._mark: Optional[Hashable] = None
+        # guards _frame, _pending and _mark, only held for in-memory updates
+        self._lock = threading.Lock()
+        # one thread at a time brings the cache up to date
+        self._refresh_lock = threading.Lock()
+
+        self.reloads: int = 0
+        self.foreign_appends: int = 0
+        self.bytes_before_compaction: int = 0
+
+    def get(self) -> pd.DataFrame:
+        """
+        The cached dataset, brought up to date with the storage. The frame is
+        shared, callers must not modify it.
+
+        Returns:
+            pd.DataFrame: The dataset.
+        """
+        return self.get_with_mark()[0]
+
+    def get_with_mark(self) -> Tuple[pd.DataFrame, Hashable]:
+        """
+        The cached dataset and the storage mark it is current to.
+
+        Returns:
+            Tuple[pd.DataFrame, Hashable]: The dataset and its mark.
+        """
+        with self._refresh_lock:
+            while True:
+                with self._lock:
+                    frame, pending, mark = self._frame, self._pending, self._mark
+
+                if frame is not None and pending:
+                    merged = self._extend(frame, pd.DataFrame(pending))
+                    with self._lock:
+                        # writers only add to the queue while the frame stays the same
+                        if self._frame is frame:
+                            self._frame, self._pending = merged, self._pending[len(pending):]
+                    continue
+
+                if frame is not None and mark == self.storage.mark():
+                    return frame, mark
+
+                appended = None if frame is None else self.storage.read_since_with_mark(mark)
+                if appended is None:
+                    new_frame, new_mark = self._load()
+                else:
+                    rows, new_mark = appended
+                    new_frame = self._extend(frame, rows)
+                    self.foreign_appends += len(rows)
+
+                with self._lock:
+                    # a writer may have added its rows meanwhile, then read again from there
+                    if self._frame is frame and self._mark == mark and not self._pending:
+                        self._frame, self._mark = new_frame, new_mark
+
+    def appended(self, rows: List[Dict[str, Any]], before: Hashable, after: Hashable) -> None:
+        """
+        Add rows that were just appended to storage. If the cache did not hold the
+        data as of before the append, it is left as is and catches up on next use.
+
+        Args:
+            rows (List[Dict[str, Any]]): The appended rows.
+            before (Hashable): Storage mark before the append.
+            after (Hashable): Storage mark after the append.
+        """
+        with self._lock:
+            if self._frame is None or self._mark != before:
+                return
+            self._pending = self._pending + rows
+            self._mark = after
+
+    def invalidate(self) -> None:
+        """
+        Drop the cached data, it is reloaded on next use.
+        """
+        with self._lock:
+            self._frame = None
+            self._pending = []
+
+    def _extend(self, frame: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        A new frame with rows added at the end, in the dtypes of the cached frame.
+        Readers may hold the current frame, it is not modified.
+        """
+        if rows.empty:
+            return frame
+
+        frame = frame.copy(deep=False)
+        new_rows = rows.reindex(columns=frame.columns)
+        for col in frame.columns:
+            if isinstance(frame[col].dtype, pd.CategoricalDtype):
+                unseen = set(new_rows[col].dropna()) - set(frame[col].cat.categories)
+                if unseen:
+                    frame[col] = frame[col].cat.add_categories(sorted(unseen))
+                new_rows[col] = pd.Categorical(new_rows[col], categories=frame[col].cat.categories)
+
+        combined = pd.concat([frame, new_rows], ignore_index=True)
+        # a value outside a downcast range widens the column, shrink it again
+        widened = [col for col in combined.columns if combined[col].dtype != frame[col].dtype]
+        for col in widened:
+            combined[col] = self._downcast(combined[col])
+        return combined
+
+    def _load(self) -> Tuple[pd.DataFrame, Hashable]:
+        df, mark = self.storage.read_with_mark()
+        self.bytes_before_compaction = int(df.memory_usage(deep=True).sum())
+        frame = self.compact(df)
+        self.reloads += 1
+        self.logger.info(
+            f"Dataset loaded into memory: {len(df)} rows, "
+            f"{self.bytes_before_compaction / 1024:.1f} KiB before and "
+            f"{frame.memory_usage(deep=True).sum() / 1024:.1f} KiB after compaction."
+        )
+        return frame, mark
+
+    @classmethod
+    def compact(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert the configured categorical columns to the category dtype and
+        downcast integer columns to the smallest type that holds their values.
+        Float columns are kept as float64 so aggregates stay exact.
+
+        Args:
+            df (pd.DataFrame): The data to compact.
+
+        Returns:
+            pd.DataFrame: A compacted copy.
+        """
+        df = df.copy()
+        for col in df.columns:
+            if col in cfg.CATEGORICAL_COLUMNS:
+                df[col] = df[col].astype('category')
+            else:
+                df[col] = cls._downcast(df[col])
+        return df
+
+    @staticmethod
+    def _downcast(values: pd.Series) -> pd.Series:
+        if pd.api.types.is_integer_dtype(values.dtype):
+            return pd.to_numeric(values, downcast='integer')
+        return values
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report the size of the cached data.
+
+        Returns:
+            Dict[str, Any]: Rows, memory before and after compaction, reloads and
+            rows picked up from other processes.
+        """
+        frame = self._frame
+        return {
+            "rows": 0 if frame is None else len(frame) + len(self._pending),
+            "bytes": 0 if frame is None else int(frame.memory_usage(deep=True).sum()),
+            "bytes_before_compaction": self.bytes_before_compaction,
+            "reloads": self.reloads,
+            "foreign_appends": self.foreign_appends
+        }
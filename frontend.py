@@ -1,14 +1,20 @@
+import os
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
 import requests
 import streamlit as st
 from dotenv import dotenv_values
 
 import data.cfg as cfg
 import analyse
+import storage
 import utils
+from cache import LRUCache
+from api_client import ApiClient
 
 
 class SleepDataFrontend:
@@ -25,6 +31,7 @@ class SleepDataFrontend:
         """
         self.logger: logging.Logger = None
         self.setup_logging()
+        self.api: ApiClient = self.api_client()
         self.run()
 
     def setup_logging(self) -> None:
@@ -34,6 +41,17 @@ class SleepDataFrontend:
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
+    @staticmethod
+    @st.cache_resource
+    def api_client() -> ApiClient:
+        """
+        The backend client, one connection pool shared by all sessions.
+
+        Returns:
+            ApiClient: The client.
+        """
+        return ApiClient()
+
     @staticmethod
     @st.cache_data
     def load_data() -> pd.DataFrame:
@@ -45,7 +63,7 @@ class SleepDataFrontend:
         """
         data_path = dotenv_values('.env')['PATH']
         try:
-            data: pd.DataFrame = pd.read_csv(data_path)
+            data: pd.DataFrame = storage.open_storage(data_path).read()
             return data
         except FileNotFoundError:
             st.error(f"Data file not found at path: {data_path}")
@@ -53,23 +71,114 @@ class SleepDataFrontend:
         except Exception as e:
             st.error(f"An error occuered while loading data: {e}")
             return pd.DataFrame()    
+
+    @staticmethod
+    @st.cache_data
+    def load_aggregates() -> Dict[str, Any]:
+        """
+        Load the chart aggregates computed by the backend.
+
+        Returns:
+            Dict[str, Any]: Group means, counts and correlations.
+        """
+        response: requests.Response = SleepDataFrontend.api_client().get(cfg.AGGREGATES_URL)
+        response.raise_for_status()
+        return response.json()
+
+    def get_aggregates(self) -> Optional[Dict[str, Any]]:
+        """
+        Aggregates from the backend, or None to let the graphs compute them from the data.
+        """
+        try:
+            return self.load_aggregates()
+        except requests.exceptions.RequestException as e:
+            self.logger.warning(f"Aggregates not available, computing them locally: {e}")
+            return None
         
 
+    @staticmethod
+    @st.cache_resource
+    def figure_cache() -> LRUCache:
+        """
+        Serialized figures keyed on data version and method name, shared by all sessions.
+
+        Returns:
+            LRUCache: The figure cache.
+        """
+        return LRUCache(cfg.FIGURE_CACHE_SIZE)
+
+    def cached_figure(self, graph_generator: analyse.GenerateGraph, method_name: str) -> Optional[go.Figure]:
+        """
+        Take a figure from the figure cache, or build and cache it.
+
+        Args:
+            graph_generator (analyse.GenerateGraph): An instance used to generate graphs.
+            method_name (str): Name of the graph method.
+
+        Returns:
+            Optional[go.Figure]: The figure, None if the method returned None.
+        """
+        cache = self.figure_cache()
+        key = (graph_generator.data_version(), method_name)
+        figure_json: Optional[str] = cache.get(key)
+        if figure_json is None:
+            fig = getattr(graph_generator, method_name)()
+            if fig is None:
+                return None
+            figure_json = fig.to_json()
+            cache.put(key, figure_json)
+        return pio.from_json(figure_json)
+
+    @staticmethod
+    @st.cache_data
+    def load_sections(file_to_parse_path: str, mtime: float) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Parse the content file into sections. The modification time is part of the
+        cache key, so the file is parsed again only after it changed.
+
+        Args:
+            file_to_parse_path (str): Path of the content file.
+            mtime (float): Modification time of the file.
+
+        Returns:
+            Dict[str, List[Tuple[str, str]]]: Blocks of every section by title.
+        """
+        return utils.Utils(file_to_parse_path).parse_sections()
+
     def clean_data(self) -> None:
         """
-        Trigger the data cleaning process by calling the backend API.
+        Schedule a cleaning job on the backend once per session and report its
+        result on a later rerun. Cached data is dropped when the job changed it.
         """
+        job: Optional[Dict[str, Any]] = st.session_state.get('clean_job')
+        if job is not None and job.get('status') in ('succeeded', 'failed'):
+            return
+
         try:
-            response: requests.Response = requests.get(cfg.CLEAN_DATA_URL)
-            if response.status_code == 200:
-                self.logger.info("Data successfully cleared.")
-                st.success("Data successfully cleared.")
+            if job is None:
+                response: requests.Response = self.api.post(cfg.CLEAN_DATA_URL)
             else:
-                self.logger.error("An error occurred while cleaning data.")
-                st.error("An error occurred while cleaning data.")
+                response = self.api.get(cfg.CLEAN_DATA_URL)
+            response.raise_for_status()
+            job = response.json()
+            st.session_state['clean_job'] = job
         except requests.exceptions.RequestException as e:
             self.logger.error(f"An error occurred while connecting to the server: {e}")
             st.error("An error occurred while connecting to the server.")
+            return
+
+        if job['status'] == 'succeeded':
+            if job.get('changed'):
+                self.load_data.clear()
+                self.load_aggregates.clear()
+            message: str = f"Data successfully cleared, {job['rows_removed']} rows removed."
+            self.logger.info(message)
+            st.success(message)
+        elif job['status'] == 'failed':
+            self.logger.error(f"An error occurred while cleaning data: {job.get('error')}")
+            st.error("An error occurred while cleaning data.")
+        else:
+            self.logger.info(f"Data cleaning {job['status']}.")
 
     def display_content(self, graph_generator: analyse.GenerateGraph) -> None:
         """
@@ -84,61 +193,43 @@ class SleepDataFrontend:
 
         file_to_parse_path: str = dotenv_values('.env')['PATH_TO_PARSE']
         utils_obj: utils.Utils = utils.Utils(file_to_parse_path)
-        content_blocks = utils_obj.parse_file()
-
-        section_titles = []
-        sections_content = []
-        current_section_blocks = []
-
-        for block_type, block_content in content_blocks:
-            if block_type == 'title':
-                if current_section_blocks:
-                    sections_content.append(current_section_blocks)
-                    current_section_blocks = []
-                section_titles.append(block_content.strip())
-            else:
-                current_section_blocks.append((block_type, block_content))
-
-        if current_section_blocks:
-            sections_content.append(current_section_blocks)
-
-        
-        section_titles.append(cfg.form_title)
-        sections_content.append([])
+        sections = self.load_sections(file_to_parse_path, os.path.getmtime(file_to_parse_path))
+        section_titles = list(sections) + [cfg.form_title]
 
         st.sidebar.title('Navigation')
 
         selected_section = st.sidebar.radio("GO TO", section_titles)
 
-        for title, blocks in zip(section_titles, sections_content):
-            if title == cfg.form_title:
-                self.display_form()
-            elif title == selected_section:
-                for block_type, block_content in blocks:
-                    if block_type == 'text':
-                        st.markdown(block_content)
-                    elif block_type == 'method':
-                        method_name: str = block_content.strip()
-                        if hasattr(graph_generator, method_name):
-                            method = getattr(graph_generator, method_name)
-                            if callable(method):
-                                try:
-                                    fig = method()
-                                    if fig:
-                                        st.plotly_chart(fig, use_container_width=True, key=utils_obj.generate_key())
-                                    else:
-                                        st.error(f"Method '{method_name}' returned None.")
-                                except Exception as e:
-                                    st.error(f"Error while calling '{method_name}': {e}")
-                                    self.logger.error(f"Error while calling '{method_name}': {e}")
+        # only the selected section is rendered
+        if selected_section == cfg.form_title:
+            self.display_form()
+            return
+
+        for index, (block_type, block_content) in enumerate(sections[selected_section]):
+            if block_type == 'text':
+                st.markdown(block_content)
+            elif block_type == 'method':
+                method_name: str = block_content.strip()
+                if hasattr(graph_generator, method_name):
+                    method = getattr(graph_generator, method_name)
+                    if callable(method):
+                        try:
+                            fig = self.cached_figure(graph_generator, method_name)
+                            if fig:
+                                key = utils_obj.generate_key(method_name, index)
+                                st.plotly_chart(fig, use_container_width=True, key=key)
                             else:
-                                st.error(f"'{method_name}' is not callable.")
-                        else:
-                            st.error(f"Method '{method_name}' not found.")
-                    elif block_type == 'code':
-                        with st.expander("Show/Close code"):
-                            st.code(block_content)
-                break
+                                st.error(f"Method '{method_name}' returned None.")
+                        except Exception as e:
+                            st.error(f"Error while calling '{method_name}': {e}")
+                            self.logger.error(f"Error while calling '{method_name}': {e}")
+                    else:
+                        st.error(f"'{method_name}' is not callable.")
+                else:
+                    st.error(f"Method '{method_name}' not found.")
+            elif block_type == 'code':
+                with st.expander("Show/Close code"):
+                    st.code(block_content)
 
     def display_form(self) -> None:
         """
@@ -170,22 +261,26 @@ class SleepDataFrontend:
                 "stress_level": stress_level,
             }
             self.handle_submission(submission_data)
-            self.handle_prediction(submission_data)
 
     def handle_submission(self, submission_data: Dict[str, Any]) -> None:
         """
-        Handle the submission of new user data to the backend.
+        Submit new user data to the backend and show the stress level predicted
+        for it, both in one request.
 
         Args:
             submission_data (Dict[str, Any]): The data to be submitted.
         """
         try:
-            response: requests.Response = requests.post(cfg.SUBMIT_URL, json=submission_data)
+            response: requests.Response = self.api.post(cfg.SUBMIT_AND_PREDICT_URL, json=submission_data)
             if response.status_code == 200:
+                result: Dict[str, Any] = response.json()
                 st.success("Data sent successfully.")
                 with st.expander("Show/Close sent data"):
-                    st.json(response.json())
-                st.cache_data.clear()
+                    st.json({"message": result["message"], "data": result["data"]})
+                # only the entries derived from the dataset are outdated
+                self.load_data.clear()
+                self.load_aggregates.clear()
+                self.display_prediction(result)
             else:
                 st.error("An error occurred while sending the data.")
                 self.logger.info(submission_data)
@@ -194,25 +289,24 @@ class SleepDataFrontend:
             st.error("Could not connect to the server.")
             self.logger.error(f"Connection error: {e}")
 
-    def handle_prediction(self, data: Dict[str, Any]) -> None:
-        try:
-            response = requests.get(cfg.PREDICT_URL, params=data)
-            response.raise_for_status()
-            data = response.json()
+    def display_prediction(self, result: Dict[str, Any]) -> None:
+        if result.get('predicted_stress_level') is None:
+            st.error(f"An error occured while predicting: {result.get('prediction_error')}")
+            return
 
-            st.write("### Predicted Stress Level on your data")
-            st.write(f"### The predicted stress level is: **{data['predicted_stress_level']}**")
-            st.write("P.S. This data is calculated based on 370 responses")
-        except requests.RequestException as e:
-            st.error(f"An error occuredwhile predicting: {e}")
+        st.write("### Predicted Stress Level on your data")
+        st.write(f"### The predicted stress level is: **{result['predicted_stress_level']}**")
+        st.write("P.S. This data is calculated based on 370 responses")
 
     def run(self) -> None:
         """
         Run the frontend application by loading data, creating a graph generator,
         and displaying content.
         """
-        data: pd.DataFrame = self.load_data()
-        graph_generator: analyse.GenerateGraph = analyse.GenerateGraph(data)
+        # the raw data is only needed when the backend cannot serve the aggregates
+        aggregates: Optional[Dict[str, Any]] = self.get_aggregates()
+        data: Optional[pd.DataFrame] = self.load_data() if aggregates is None else None
+        graph_generator: analyse.GenerateGraph = analyse.GenerateGraph(data, aggregates)
         self.display_content(graph_generator)
 
 
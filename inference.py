@@ -0,0 +1,248 @@
+import os
+import glob
+import json
+import uuid
+import shutil
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from dotenv import dotenv_values
+
+
+FORMAT_VERSION: int = 2
+TREE_ARRAYS: List[str] = ["feature", "threshold", "children", "value", "roots"]
+
+
+def compact_path(model_path: str) -> str:
+    """
+    Directory of the compact artifact that belongs to a pickled model.
+
+    Args:
+        model_path (str): Path of the pickled pipeline.
+
+    Returns:
+        str: Path of the compact artifact directory.
+    """
+    return os.path.splitext(model_path)[0] + '_compact'
+
+
+def export_compact(pipeline: Any, directory: str, source_version: Optional[str] = None) -> None:
+    """
+    Flatten a fitted pipeline (ColumnTransformer with a OneHotEncoder and passthrough
+    remainder, followed by a RandomForestRegressor) into plain NumPy arrays:
+    - Tree nodes of all estimators are concatenated into one array per field and
+      child indices point into the concatenated arrays. children[node] holds the
+      right and the left child, so the next node is children[node, x <= threshold].
+    - Leaves point to themselves with an infinite threshold, so a traversal can run
+      a fixed number of steps (the forest depth) without checking for leaves.
+    - The encoder becomes a category -> output column table per categorical column.
+
+    The arrays are written as .npy files so they can be memory-mapped. Every export
+    goes to a directory of its own and the target path is a symlink to the current
+    one, swapped in a single rename: the path always resolves to a complete export,
+    and files of a previous export are never overwritten in place.
+
+    Args:
+        pipeline (Any): The fitted sklearn pipeline.
+        directory (str): Target directory.
+        source_version (Optional[str], optional): Version of the pickled model the
+            artifact was made from. Defaults to None.
+    """
+    from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+    preprocessor = pipeline.named_steps['preprocessing']
+    forest = pipeline.named_steps['regressor']
+    feature_names = list(pipeline.feature_names_in_)
+
+    # output columns of the ColumnTransformer, in order
+    categorical: Dict[str, Dict[str, int]] = {}
+    numeric: Dict[str, int] = {}
+    offset = 0
+    for name, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, str) and transformer == 'drop' or len(columns) == 0:
+            continue
+        is_passthrough = isinstance(transformer, str) and transformer == 'passthrough'
+        if is_passthrough or isinstance(transformer, FunctionTransformer) and transformer.func is None:
+            for column in columns:
+                column_name = feature_names[column] if isinstance(column, (int, np.integer)) else column
+                numeric[column_name] = offset
+                offset += 1
+        elif isinstance(transformer, OneHotEncoder):
+            if transformer.drop is not None:
+                raise ValueError("OneHotEncoder with drop is not supported.")
+            for column, categories in zip(columns, transformer.categories_):
+                categorical[column] = {str(category): offset + i for i, category in enumerate(categories)}
+                offset += len(categories)
+        else:
+            raise ValueError(f"Unsupported transformer '{name}': {transformer}")
+
+    if offset != forest.n_features_in_:
+        raise ValueError("Transformed width does not match the forest input.")
+
+    feature, threshold, children, value, roots = [], [], [], [], []
+    base = 0
+    max_depth = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        own_index = np.arange(tree.node_count) + base
+        roots.append(base)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        children.append(np.stack([
+            np.where(is_leaf, own_index, tree.children_right + base),
+            np.where(is_leaf, own_index, tree.children_left + base)
+        ], axis=1))
+        value.append(tree.value[:, 0, 0])
+        base += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "children": np.concatenate(children).astype(np.int64),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.int64)
+    }
+    meta = {
+        "format": FORMAT_VERSION,
+        "feature_names": feature_names,
+        "source_version": source_version,
+        "n_outputs": offset,
+        "max_depth": max_depth,
+        "categorical": categorical,
+        "numeric": numeric
+    }
+
+    export_dir = f"{directory}-{uuid.uuid4().hex[:12]}"
+    os.makedirs(export_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(export_dir, f"{name}.npy"), array)
+    with open(os.path.join(export_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    previous_dir = os.path.realpath(directory) if os.path.islink(directory) else None
+    if os.path.isdir(directory) and not os.path.islink(directory):
+        # exported before the directories were versioned
+        shutil.rmtree(directory)
+    link_tmp = f"{directory}.link.tmp"
+    if os.path.lexists(link_tmp):
+        os.remove(link_tmp)
+    os.symlink(os.path.basename(export_dir), link_tmp)
+    os.replace(link_tmp, directory)
+
+    # the previous export is kept for readers that resolved the link just before the
+    # swap, older ones are removed; processes that mapped their files keep their pages
+    keep = {os.path.realpath(export_dir), previous_dir}
+    for old_dir in glob.glob(f"{glob.escape(directory)}-*"):
+        if os.path.realpath(old_dir) not in keep:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+
+class CompactForest:
+    """
+    CompactForest predicts with a model exported by export_compact using NumPy only:
+    - Arrays are memory-mapped, so loading is cheap and pages are shared between processes.
+    - All trees are walked level by level for the whole batch at once, each level
+      being a handful of gathers over an (n_rows, n_trees) matrix of node indices.
+    - It accepts the same DataFrame input as the sklearn pipeline.
+    """
+
+    def __init__(self, directory: str, mmap: bool = True) -> None:
+        """
+        Load an exported artifact.
+
+        Args:
+            directory (str): Directory written by export_compact.
+            mmap (bool, optional): Memory-map the arrays instead of reading them. Defaults to True.
+        """
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact model format {meta['format']}.")
+
+        self.feature_names_in_ = np.asarray(meta["feature_names"], dtype=object)
+        self.source_version: Optional[str] = meta["source_version"]
+        self.n_outputs: int = meta["n_outputs"]
+        self.max_depth: int = meta["max_depth"]
+        self.categorical: Dict[str, Dict[str, int]] = meta["categorical"]
+        self.numeric: Dict[str, int] = meta["numeric"]
+
+        mmap_mode = 'r' if mmap else None
+        for name in TREE_ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Encode input rows the way the fitted ColumnTransformer does.
+        Unknown categories are encoded as all zeros.
+
+        Args:
+            X (pd.DataFrame): Input rows with the training column names.
+
+        Returns:
+            np.ndarray: Encoded float32 matrix.
+        """
+        encoded = np.zeros((len(X), self.n_outputs), dtype=np.float32)
+        rows = np.arange(len(X))
+
+        for column, table in self.categorical.items():
+            index = X[column].astype(str).map(table).to_numpy(dtype=np.float64, na_value=np.nan)
+            known = ~np.isnan(index)
+            encoded[rows[known], index[known].astype(np.intp)] = 1.0
+
+        for column, index in self.numeric.items():
+            encoded[:, index] = X[column].to_numpy(dtype=np.float32)
+
+        return encoded
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Predict the target for input rows, averaging all trees.
+
+        Args:
+            X (pd.DataFrame): Input rows with the training column names.
+
+        Returns:
+            np.ndarray: One prediction per row.
+        """
+        encoded = self.transform(X)
+        # flat gathers are cheaper than 2D fancy indexing
+        flat_encoded = encoded.ravel()
+        row_offsets = (np.arange(len(encoded)) * self.n_outputs)[:, None]
+        flat_children = self.children.reshape(-1)
+        node = np.broadcast_to(self.roots, (len(encoded), len(self.roots)))
+
+        for _ in range(self.max_depth):
+            go_left = flat_encoded[row_offsets + self.feature[node]] <= self.threshold[node]
+            node = flat_children[2 * node + go_left]
+
+        return self.value[node].mean(axis=1)
+
+
+if __name__ == '__main__':
+    # Export the compact model and check it against the pickled pipeline.
+    import joblib
+    from model_registry import ModelRegistry
+    from storage import open_storage
+
+    MODEL_PATH = dotenv_values('.env')['MODEL_PATH']
+    pipeline = joblib.load(MODEL_PATH)
+    export_compact(pipeline, compact_path(MODEL_PATH), ModelRegistry.version_of(MODEL_PATH))
+    print(f"Compact model saved in {compact_path(MODEL_PATH)}")
+
+    columns = list(pipeline.feature_names_in_)
+    X = open_storage(dotenv_values('.env')['PATH']).read()[columns].dropna()
+    # categories the encoder has never seen are encoded as all zeros by both
+    unknown = X.head(10).copy()
+    unknown['Gender'] = 'Unknown'
+    unknown['Occupation'] = 'Astronaut'
+    X = pd.concat([X, unknown], ignore_index=True)
+
+    forest = CompactForest(compact_path(MODEL_PATH))
+    expected, actual = pipeline.predict(X), forest.predict(X)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    assert np.allclose(expected, actual, rtol=0, atol=1e-9), max_diff
+    print(f"Compact model matches the pipeline on {len(X)} rows, {len(unknown)} with unknown categories "
+          f"(max abs diff {max_diff}).")
@@ -0,0 +1,254 @@
+import os
+import re
+import time
+import shutil
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import joblib
+
+from inference import CompactForest, compact_path, export_compact
+from file_lock import FileLock
+
+
+class LoadedModel(NamedTuple):
+    model: Any
+    version: str
+    path: str
+    loaded_at: datetime
+    load_seconds: float
+
+
+class ModelRegistry:
+    """
+    ModelRegistry keeps versioned model artifacts and the model currently in use:
+    - Archives artifacts in a directory, named by a hash of their content.
+    - Loads a model in a worker thread and swaps the active reference in one step,
+      so requests in flight keep using the model they started with.
+    - Watches the model file and reloads it when it is replaced.
+    - Serves either the unpickled sklearn pipeline or the compact NumPy engine.
+    """
+
+    # versions are short content hashes, see version_of
+    VERSION_PATTERN: re.Pattern = re.compile(r'[0-9a-f]{12}')
+
+    def __init__(self,
+                 model_path: str,
+                 registry_dir: str,
+                 on_swap: Optional[Callable[[LoadedModel], None]] = None,
+                 engine: str = 'sklearn') -> None:
+        """
+        Initialize the registry without loading anything.
+
+        Args:
+            model_path (str): Path of the current model file.
+            registry_dir (str): Directory with archived model versions.
+            on_swap (Optional[Callable[[LoadedModel], None]], optional): Called after
+                a new model became active. Defaults to None.
+            engine (str, optional): 'sklearn' or 'numpy'. Defaults to 'sklearn'.
+        """
+        if engine not in ('sklearn', 'numpy'):
+            raise ValueError(f"Unknown prediction engine '{engine}'.")
+        self.model_path: str = model_path
+        self.registry_dir: str = registry_dir
+        self.on_swap = on_swap
+        self.engine: str = engine
+        self.active: Optional[LoadedModel] = None
+        self.logger = logging.getLogger(__name__)
+
+        self._reload_lock = asyncio.Lock()
+        self._watched_mtime: Optional[int] = None
+
+    @property
+    def model(self) -> Any:
+        """
+        The active model, or None if no model is loaded.
+        """
+        active = self.active
+        return active.model if active is not None else None
+
+    @staticmethod
+    def version_of(path: str) -> str:
+        """
+        Compute the version of an artifact from its content.
+
+        Args:
+            path (str): Path of the artifact.
+
+        Returns:
+            str: Short content hash.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()[:12]
+
+    def archive(self, path: str) -> str:
+        """
+        Copy an artifact into the registry directory under its version.
+
+        Args:
+            path (str): Path of the artifact to archive.
+
+        Returns:
+            str: Version of the archived artifact.
+        """
+        version = self.version_of(path)
+        os.makedirs(self.registry_dir, exist_ok=True)
+        target = os.path.join(self.registry_dir, f"{version}.pkl")
+        if not os.path.exists(target):
+            shutil.copy2(path, target)
+        return version
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """
+        List archived versions, oldest first.
+
+        Returns:
+            List[Dict[str, Any]]: Version names with their archive time.
+        """
+        if not os.path.isdir(self.registry_dir):
+            return []
+
+        entries = []
+        for name in os.listdir(self.registry_dir):
+            if name.endswith('.pkl'):
+                mtime = os.path.getmtime(os.path.join(self.registry_dir, name))
+                entries.append({
+                    "version": name[:-len('.pkl')],
+                    "archived_at": datetime.fromtimestamp(mtime, timezone.utc).isoformat()
+                })
+        return sorted(entries, key=lambda entry: entry["archived_at"])
+
+    def load(self, version: Optional[str] = None) -> LoadedModel:
+        """
+        Load a model and make it the active one. Blocking.
+
+        Args:
+            version (Optional[str], optional): Archived version to load. Defaults to None,
+                which loads the current model file.
+
+        Returns:
+            LoadedModel: The model that became active.
+        """
+        if version is None:
+            path = self.model_path
+            self._watched_mtime = os.stat(path).st_mtime_ns
+        else:
+            # the version comes from the API, it must not point outside the registry
+            if not self.VERSION_PATTERN.fullmatch(version):
+                raise FileNotFoundError(f"Model version '{version}' not found.")
+            path = os.path.join(self.registry_dir, f"{version}.pkl")
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model version '{version}' not found.")
+
+        version = version or self.version_of(path)
+        start = time.perf_counter()
+        model = self._load_artifact(path, version)
+        loaded = LoadedModel(
+            model=model,
+            version=version,
+            path=path,
+            loaded_at=datetime.now(timezone.utc),
+            load_seconds=time.perf_counter() - start
+        )
+
+        self.active = loaded
+        self.logger.info(f"Model version {loaded.version} loaded from {path} in {loaded.load_seconds:.3f}s.")
+        if self.on_swap is not None:
+            self.on_swap(loaded)
+        return loaded
+
+    def _load_artifact(self, path: str, version: str) -> Any:
+        """
+        Load a pickled model with the configured engine. For the NumPy engine the
+        compact artifact is exported first if it is missing or made from another version.
+
+        Args:
+            path (str): Path of the pickled model.
+            version (str): Version of the pickled model.
+
+        Returns:
+            Any: An object with predict and feature_names_in_.
+        """
+        if self.engine == 'sklearn':
+            return joblib.load(path)
+
+        directory = compact_path(path)
+        forest = self._open_compact(directory, version)
+        if forest is not None:
+            return forest
+
+        # worker processes starting together export it only once
+        with FileLock(f"{directory}.lock").hold():
+            forest = self._open_compact(directory, version)
+            if forest is None:
+                self.logger.info(f"Exporting compact model to {directory}.")
+                export_compact(joblib.load(path), directory, version)
+                forest = CompactForest(directory)
+        return forest
+
+    @staticmethod
+    def _open_compact(directory: str, version: str) -> Optional[CompactForest]:
+        """
+        Open the compact artifact if it exists and was made from the given version.
+        """
+        try:
+            forest = CompactForest(directory)
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        return forest if forest.source_version == version else None
+
+    async def reload(self, version: Optional[str] = None) -> LoadedModel:
+        """
+        Load a model in a worker thread and swap it in. Concurrent reloads run one at a time.
+
+        Args:
+            version (Optional[str], optional): Archived version to load. Defaults to None.
+
+        Returns:
+            LoadedModel: The model that became active.
+        """
+        async with self._reload_lock:
+            return await asyncio.to_thread(self.load, version)
+
+    async def watch(self, interval: float) -> None:
+        """
+        Poll the model file and reload it whenever it is replaced. Runs until cancelled.
+
+        Args:
+            interval (float): Seconds between checks.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                mtime = os.stat(self.model_path).st_mtime_ns
+                if mtime != self._watched_mtime:
+                    self.logger.info("Model file changed, reloading.")
+                    await self.reload()
+            except Exception as e:
+                # keep serving the current model
+                self.logger.error(f"An error '{e}' occured while reloading model.")
+
+    def info(self) -> Dict[str, Any]:
+        """
+        Describe the active model and the archived versions.
+
+        Returns:
+            Dict[str, Any]: Registry state.
+        """
+        active = self.active
+        return {
+            "engine": self.engine,
+            "active": None if active is None else {
+                "version": active.version,
+                "path": active.path,
+                "loaded_at": active.loaded_at.isoformat(),
+                "load_seconds": active.load_seconds
+            },
+            "versions": self.versions()
+        }
@@ -1,8 +1,9 @@
-from typing import Any
-from fastapi import APIRouter, FastAPI, Query
+import json
+from typing import Any, List, Optional
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from data.base_model import FormData
+from data.base_model import FormData, PredictionData
 
 
 class Routes:
@@ -16,7 +17,7 @@ class Routes:
 
         Args:
             app (FastAPI): The FastAPI instance.
-            backend_instance (Any): The backend instance providing clean_data and submit_data methods.
+            backend_instance (Any): The backend instance providing schedule_clean and submit_data methods.
         """
         self.app: FastAPI = app
         self.backend = backend_instance
@@ -44,9 +45,33 @@ class Routes:
         async def submit_data(data: FormData) -> Any:
             return await self.backend.submit_data(data)
 
+        @self.router.post('/api/submit_and_predict/')
+        async def submit_and_predict(data: FormData) -> Any:
+            return await self.backend.submit_and_predict(data)
+
+        @self.router.post('/api/submit_batch/')
+        async def submit_batch(request: Request) -> Any:
+            return await self.backend.submit_batch(await self.read_records(request))
+
+        @self.router.post('/api/clean_data/', status_code=202)
+        async def schedule_clean() -> Any:
+            return await self.backend.schedule_clean()
+
         @self.router.get('/api/clean_data/')
-        async def clean_data() -> Any:
-            return await self.backend.clean_data()
+        async def clean_status() -> Any:
+            return self.backend.clean_status()
+
+        @self.router.get('/api/data/')
+        async def get_data(limit: int = Query(5, ge=0, le=1000)) -> Any:
+            return await self.backend.get_data(limit)
+
+        @self.router.get('/api/aggregates/')
+        async def get_aggregates() -> Any:
+            return await self.backend.get_aggregates()
+
+        @self.router.post('/api/aggregates/rebuild/')
+        async def rebuild_aggregates() -> Any:
+            return await self.backend.get_aggregates(rebuild=True)
 
         @self.router.get('/api/')
         async def main() -> dict[str, str]:
@@ -66,4 +91,55 @@ class Routes:
                 sleep_duration, quality_of_sleep, physical_activity_level
             )
 
+        @self.router.get('/api/metrics/')
+        async def metrics() -> Any:
+            return self.backend.get_metrics()
+
+        @self.router.get('/api/model/')
+        async def model_info() -> Any:
+            return self.backend.model_info()
+
+        @self.router.post('/api/model/reload/')
+        async def reload_model(version: Optional[str] = Query(None)) -> Any:
+            return await self.backend.reload_model(version)
+
+        @self.router.post('/api/model/retrain/')
+        async def retrain_model() -> Any:
+            return await self.backend.retrain_model()
+
+        @self.router.post('/api/predict_stress_batch/')
+        async def predict_stress_batch(rows: List[PredictionData]) -> Any:
+            return await self.backend.predict_stress_batch(rows)
+
         self.app.include_router(self.router)
+
+    @staticmethod
+    async def read_records(request: Request) -> List[Any]:
+        """
+        Read batch records from the request body. NDJSON bodies are consumed as a
+        stream and split into lines, anything else must be a JSON array.
+
+        Args:
+            request (Request): The incoming request.
+
+        Returns:
+            List[Any]: Decoded objects (JSON array) or raw lines (NDJSON).
+        """
+        content_type = request.headers.get('content-type', '')
+        if 'ndjson' in content_type or 'jsonl' in content_type:
+            lines: List[bytes] = []
+            tail = b''
+            async for chunk in request.stream():
+                *complete, tail = (tail + chunk).split(b'\n')
+                lines.extend(line for line in complete if line.strip())
+            if tail.strip():
+                lines.append(tail)
+            return lines
+
+        try:
+            records = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(records, list):
+            raise HTTPException(status_code=422, detail="Expected a JSON array of records.")
+        return records
@@ -0,0 +1,748 @@
+import os
+import io
+import csv
+import json
+import glob
+import shutil
+import sqlite3
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for the columnar engines
+    pa = None
+
+import data.cfg as cfg
+
+
+class DataStorage(ABC):
+    """
+    DataStorage is the interface every module uses to load and save the dataset:
+    - Reading and replacing the whole table.
+    - Appending rows without rewriting existing data.
+    - A change mark, and reading or replacing the rows appended after a mark.
+
+    Engines implement the abstract methods, an incomplete engine cannot be created.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the storage.
+
+        Args:
+            path (str): Location of the dataset.
+        """
+        self.path: str = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    @abstractmethod
+    def columns(self) -> List[str]:
+        """
+        Column names of the stored table.
+        """
+
+    @abstractmethod
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Load the table.
+
+        Args:
+            columns (Optional[List[str]], optional): Columns to load. Defaults to None (all).
+
+        Returns:
+            pd.DataFrame: The loaded data.
+        """
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Replace the whole table.
+
+        Args:
+            df (pd.DataFrame): The new content.
+        """
+
+    @abstractmethod
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Durably add rows at the end of the table.
+
+        Args:
+            rows (List[Dict[str, Any]]): Rows keyed by column name.
+        """
+
+    @abstractmethod
+    def mark(self) -> Hashable:
+        """
+        A cheap token that changes whenever the stored data changes.
+        """
+
+    def read_with_mark(self, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Hashable]:
+        """
+        Load the table together with the mark it is current to. Other processes
+        may append meanwhile, the rows never go beyond the returned mark.
+
+        Args:
+            columns (Optional[List[str]], optional): Columns to load. Defaults to None (all).
+
+        Returns:
+            Tuple[pd.DataFrame, Hashable]: The loaded data and its mark.
+        """
+        while True:
+            mark = self.mark()
+            df = self.read(columns)
+            if self.mark() == mark:
+                return df, mark
+
+    def read_since(self, mark: Hashable) -> Optional[pd.DataFrame]:
+        """
+        Load the rows appended after a mark.
+
+        Args:
+            mark (Hashable): A value returned by mark().
+
+        Returns:
+            Optional[pd.DataFrame]: The appended rows, or None if the data changed
+            in another way than appending since the mark.
+        """
+        result = self.read_since_with_mark(mark)
+        return None if result is None else result[0]
+
+    @abstractmethod
+    def read_since_with_mark(self, mark: Hashable) -> Optional[Tuple[pd.DataFrame, Hashable]]:
+        """
+        Load the rows appended after a mark together with the mark they are
+        current to, like read_with_mark.
+
+        Args:
+            mark (Hashable): A value returned by mark().
+
+        Returns:
+            Optional[Tuple[pd.DataFrame, Hashable]]: The appended rows and the new
+            mark, or None if the data changed in another way than appending.
+        """
+
+    @abstractmethod
+    def replace_since(self, mark: Hashable, df: pd.DataFrame) -> None:
+        """
+        Replace the rows appended after a mark, keeping everything before it.
+
+        Args:
+            mark (Hashable): A value returned by mark().
+            df (pd.DataFrame): The rows to keep in place of the appended ones.
+        """
+
+    def compact(self) -> bool:
+        """
+        Merge the files the table is stored in if appends left too many of them.
+
+        Returns:
+            bool: Whether the table was rewritten.
+        """
+        return False
+
+    def clean(self, columns_to_delete: List[str], since: Optional[Hashable] = None) -> Optional[Dict[str, Any]]:
+        """
+        Apply the cleaning rules inside the storage engine, if it can.
+
+        Args:
+            columns_to_delete (List[str]): Columns to drop.
+            since (Optional[Hashable], optional): Only check rows appended after this mark.
+                Defaults to None (all rows).
+
+        Returns:
+            Optional[Dict[str, Any]]: rows_checked, rows_removed and changed, or None
+            if the engine does not clean by itself and the caller has to.
+        """
+        return None
+
+    def last_person_id(self) -> int:
+        """
+        The highest Person ID in the table, 0 if it is empty.
+        """
+        person_ids = self.read(columns=["Person ID"])["Person ID"]
+        last_person_id = person_ids.max()
+        return int(last_person_id) if pd.notnull(last_person_id) else 0
+
+
+class CsvStorage(DataStorage):
+    """
+    CsvStorage keeps the table in a single CSV file. Appends go to the end of the
+    file and are fsynced. Rewrites go to a temporary file that is renamed over
+    the table, so readers see either the old or the new file, never a
+    half-written one. A generation counter in a file next to the table is bumped
+    after every rewrite. The mark is the generation, file size, modification time
+    and inode; a new generation or inode tells readers the file was rewritten
+    rather than appended to. Inodes alone are not enough, the filesystem reuses
+    the inode of a replaced file.
+    """
+
+    def columns(self) -> List[str]:
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            return next(csv.reader(f))
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return pd.read_csv(self.path, usecols=columns)
+
+    def write(self, df: pd.DataFrame) -> None:
+        with self._replacing() as f:
+            f.write(df.to_csv(index=False, lineterminator='\n').encode('utf-8'))
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.columns(), lineterminator='\n')
+        writer.writerows(rows)
+
+        with open(self.path, 'ab+') as f:
+            self._write_lines(f, buffer.getvalue())
+
+    def mark(self) -> Hashable:
+        generation = self._generation()
+        stat = os.stat(self.path)
+        return generation, stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    def read_with_mark(self, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Hashable]:
+        while True:
+            generation = self._generation()
+            with open(self.path, 'rb') as f:
+                data, mark = self._read_complete(f, 0, generation)
+            # a rewrite completed meanwhile, the file may be newer than the generation
+            if self._generation() == generation:
+                return pd.read_csv(io.BytesIO(data), usecols=columns), mark
+
+    def read_since_with_mark(self, mark: Hashable) -> Optional[Tuple[pd.DataFrame, Hashable]]:
+        generation, size, _, inode = mark
+        if self._generation() != generation:
+            return None
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != inode or stat.st_size < size:
+                return None
+            appended, new_mark = self._read_complete(f, size, generation)
+        if self._generation() != generation:
+            return None
+
+        if not appended.strip():
+            return pd.DataFrame(columns=self.columns()), new_mark
+        return pd.read_csv(io.BytesIO(appended), header=None, names=self.columns()), new_mark
+
+    @staticmethod
+    def _read_complete(f: io.BufferedReader, start: int, generation: int) -> Tuple[bytes, Hashable]:
+        """
+        Read an open file from start up to its current end, leaving out a line
+        that is still being appended, and return the mark of what was read.
+        """
+        stat = os.fstat(f.fileno())
+        f.seek(start)
+        data = f.read(stat.st_size - start)
+        if data and not data.endswith(b'\n') and os.fstat(f.fileno()).st_size != stat.st_size:
+            data = data[:data.rfind(b'\n') + 1]
+        return data, (generation, start + len(data), stat.st_mtime_ns, stat.st_ino)
+
+    def replace_since(self, mark: Hashable, df: pd.DataFrame) -> None:
+        _, size, _, _ = mark
+        with self._replacing() as f:
+            with open(self.path, 'rb') as source:
+                shutil.copyfileobj(source, f)
+            f.truncate(size)
+            self._write_lines(f, df.to_csv(index=False, header=False, lineterminator='\n'))
+
+    @contextmanager
+    def _replacing(self) -> Iterator[io.BufferedRandom]:
+        """
+        Open a temporary file next to the table and rename it over the table once
+        the with block completed. On error the table is left untouched.
+        """
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w+b') as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+            generation = self._generation()
+            os.replace(tmp_path, self.path)
+            self._save_generation(generation + 1)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _generation(self) -> int:
+        try:
+            with open(f"{self.path}.generation", 'r', encoding='utf-8') as f:
+                return int(f.read())
+        except FileNotFoundError:
+            # tables never rewritten since the counter was introduced
+            return 0
+
+    def _save_generation(self, generation: int) -> None:
+        # renamed into place, readers see the old or the new counter
+        path = f"{self.path}.generation"
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            f.write(str(generation))
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def _write_lines(f: io.BufferedRandom, text: str) -> None:
+        """
+        Write lines at the end of an open file, starting a new line if the file
+        does not end with one, and fsync.
+        """
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+        f.seek(0, os.SEEK_END)
+        f.write(text.encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class ArrowStorage(DataStorage):
+    """
+    ArrowStorage keeps the table as a directory of immutable Parquet or Feather parts:
+    - Columns are typed, categorical columns are stored dictionary encoded.
+    - An append writes one new part, existing parts are never rewritten.
+    - write() replaces all parts with a single one; compact() does the same once
+      appends left more than cfg.ARROW_MAX_PARTS parts.
+    - Parts are numbered by a sequence. A small state file lists the parts that
+      make up the table: the oldest and newest sequence and the ranges dropped in
+      between. Saving it commits a change, readers only read the parts it lists
+      and parts it no longer lists are deleted afterwards.
+    - A generation in the state is bumped by every change other than an append;
+      the mark is (generation, sequence), read in O(1).
+    """
+
+    STATE_FILE: str = 'state.json'
+
+    def __init__(self, path: str, file_format: str = 'parquet') -> None:
+        """
+        Initialize the storage.
+
+        Args:
+            path (str): Directory holding the parts.
+            file_format (str, optional): 'parquet' or 'feather'. Defaults to 'parquet'.
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for the parquet and feather storage engines.")
+        super().__init__(path)
+        self.file_format: str = file_format
+        self.extension: str = f".{file_format}"
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, self.STATE_FILE)) or bool(self._parts())
+
+    def columns(self) -> List[str]:
+        sequences = self._live_sequences(self._state())
+        if not sequences:
+            return []
+        part = self._part_path(sequences[-1])
+        if self.file_format == 'parquet':
+            return pq.read_schema(part).names
+        with pa.memory_map(part) as source:
+            return pa.ipc.open_file(source).schema.names
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return self.read_with_mark(columns)[0]
+
+    def write(self, df: pd.DataFrame) -> None:
+        state = self._state()
+        sequence = state['sequence'] + 1
+        self._write_part(df, sequence)
+        self._save_state(state['generation'] + 1, sequence, sequence, [])
+        self._remove_garbage()
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        state = self._state()
+        self._write_part(pd.DataFrame(rows), state['sequence'] + 1)
+        self._save_state(state['generation'], state['base'], state['sequence'] + 1, state['dropped'])
+
+    def compact(self) -> bool:
+        # parts left behind by an interrupted rewrite are not part of the table
+        self._remove_garbage()
+        if len(self._live_sequences(self._state())) <= cfg.ARROW_MAX_PARTS:
+            return False
+        self.write(self.read())
+        return True
+
+    def mark(self) -> Hashable:
+        state = self._state()
+        return state['generation'], state['sequence']
+
+    def read_with_mark(self, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Hashable]:
+        while True:
+            state = self._state()
+            # only the parts listed by the state, parts appended meanwhile are left out
+            parts = [self._part_path(i) for i in self._live_sequences(state)]
+            try:
+                return self._read_parts(parts, columns), (state['generation'], state['sequence'])
+            except FileNotFoundError:
+                # removed after a rewrite committed a new state
+                continue
+
+    def read_since_with_mark(self, mark: Hashable) -> Optional[Tuple[pd.DataFrame, Hashable]]:
+        generation, sequence = mark
+        while True:
+            current = self.mark()
+            if current[0] != generation:
+                return None
+            new_parts = [self._part_path(i) for i in range(sequence + 1, current[1] + 1)]
+            try:
+                return self._read_parts(new_parts), current
+            except FileNotFoundError:
+                # removed by a rewrite, which also changed the generation
+                continue
+
+    def replace_since(self, mark: Hashable, df: pd.DataFrame) -> None:
+        _, since = mark
+        state = self._state()
+        sequence, dropped = state['sequence'], state['dropped']
+        if since < sequence:
+            dropped = dropped + [[since + 1, sequence]]
+        if len(df):
+            sequence += 1
+            self._write_part(df, sequence)
+        self._save_state(state['generation'] + 1, state['base'], sequence, dropped)
+        self._remove_garbage()
+
+    def _parts(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.path, f"part-*{self.extension}")))
+
+    def _part_path(self, sequence: int) -> str:
+        return os.path.join(self.path, f"part-{sequence:08d}{self.extension}")
+
+    def _sequence_of(self, part: str) -> int:
+        return int(os.path.basename(part)[len('part-'):-len(self.extension)])
+
+    def _state(self) -> Dict[str, Any]:
+        """
+        The state of the table: the generation, the sequences of the oldest (base)
+        and newest part, and the ranges of sequences in between dropped by
+        replace_since. Only those parts make up the table, others are garbage.
+        """
+        try:
+            with open(os.path.join(self.path, self.STATE_FILE), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if 'base' in state:
+                return state
+        except FileNotFoundError:
+            state = None
+
+        # written before the state held the live parts, all parts on disk are live
+        sequences = [self._sequence_of(part) for part in self._parts()]
+        sequence = state['sequence'] if state is not None else (sequences[-1] if sequences else -1)
+        sequences = [i for i in sequences if i <= sequence]
+        return {
+            'generation': state['generation'] if state is not None else 0,
+            'base': sequences[0] if sequences else sequence + 1,
+            'sequence': sequence,
+            'dropped': [[low + 1, high - 1] for low, high in zip(sequences, sequences[1:]) if high - low > 1]
+        }
+
+    @staticmethod
+    def _live_sequences(state: Dict[str, Any]) -> List[int]:
+        return [i for i in range(state['base'], state['sequence'] + 1)
+                if not any(low <= i <= high for low, high in state['dropped'])]
+
+    def _save_state(self, generation: int, base: int, sequence: int, dropped: List[List[int]]) -> None:
+        # renamed into place, readers see the old or the new state; saving it commits a change
+        path = os.path.join(self.path, self.STATE_FILE)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({'generation': generation, 'base': base, 'sequence': sequence, 'dropped': dropped}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _remove_garbage(self) -> None:
+        """
+        Delete the parts that are not part of the table, once the state no longer lists them.
+        """
+        live = set(self._live_sequences(self._state()))
+        for part in self._parts():
+            if self._sequence_of(part) not in live:
+                try:
+                    os.remove(part)
+                except FileNotFoundError:
+                    pass
+
+    def _write_part(self, df: pd.DataFrame, sequence: int) -> None:
+        """
+        Write a frame as the part with the given sequence. The part is written
+        under a temporary name and renamed, so readers never see it half-written.
+        """
+        path = self._part_path(sequence)
+
+        df = df.copy()
+        for col in cfg.CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        if self.file_format == 'parquet':
+            pq.write_table(table, tmp_path)
+        else:
+            feather.write_feather(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _read_parts(self, parts: List[str], columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read parts into one frame. Dictionary columns are decoded, so callers get
+        the same dtypes as from the CSV engine.
+        """
+        if not parts:
+            return pd.DataFrame(columns=columns if columns is not None else self.columns())
+
+        tables = []
+        for part in parts:
+            if self.file_format == 'parquet':
+                table = pq.read_table(part, columns=columns)
+            else:
+                table = feather.read_table(part, columns=columns)
+            schema = pa.schema([
+                field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                for field in table.schema
+            ])
+            tables.append(table.cast(schema))
+
+        return pa.concat_tables(tables, promote_options='permissive').to_pandas()
+
+
+class SqliteStorage(DataStorage):
+    """
+    SqliteStorage keeps the table in an SQLite database in WAL mode:
+    - Person ID is an autoincrement primary key, Age and Occupation are indexed.
+    - Appends are prepared INSERTs and cleaning runs as SQL deletes and updates.
+    - Readers are not blocked by the single writer.
+    - The mark is (generation, last Person ID); the generation is bumped by every
+      change other than an append.
+    """
+
+    TABLE: str = 'sleep_data'
+    INDEXED_COLUMNS: List[str] = ["Age", "Occupation"]
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        # sqlite3 connections must stay in the thread that created them
+        self._local = threading.local()
+
+    def exists(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+        return self._connection().execute(query, (self.TABLE,)).fetchone() is not None
+
+    def columns(self) -> List[str]:
+        return [row[1] for row in self._connection().execute(f"PRAGMA table_info({self.TABLE})")]
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        selected = ', '.join(map(self._quote, columns)) if columns else '*'
+        query = f'SELECT {selected} FROM {self.TABLE} ORDER BY "Person ID"'
+        return pd.read_sql_query(query, self._connection())
+
+    def write(self, df: pd.DataFrame) -> None:
+        with self._transaction() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {self.TABLE}")
+            self._create_table(conn, df)
+            self._insert(conn, df)
+            self._bump_generation(conn)
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        columns = self.columns()
+        df = pd.DataFrame(rows).reindex(columns=columns)
+        with self._transaction() as conn:
+            self._insert(conn, df)
+
+    def mark(self) -> Hashable:
+        return self._mark(self._connection())
+
+    def read_with_mark(self, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Hashable]:
+        selected = ', '.join(map(self._quote, columns)) if columns else '*'
+        with self._snapshot() as conn:
+            mark = self._mark(conn)
+            df = pd.read_sql_query(f'SELECT {selected} FROM {self.TABLE} ORDER BY "Person ID"', conn)
+        return df, mark
+
+    def read_since_with_mark(self, mark: Hashable) -> Optional[Tuple[pd.DataFrame, Hashable]]:
+        generation, last_person_id = mark
+        with self._snapshot() as conn:
+            current = self._mark(conn)
+            if current[0] != generation:
+                return None
+            query = f'SELECT * FROM {self.TABLE} WHERE "Person ID" > ? ORDER BY "Person ID"'
+            rows = pd.read_sql_query(query, conn, params=(last_person_id,))
+        return rows, current
+
+    def replace_since(self, mark: Hashable, df: pd.DataFrame) -> None:
+        _, last_person_id = mark
+        with self._transaction() as conn:
+            conn.execute(f'DELETE FROM {self.TABLE} WHERE "Person ID" > ?', (last_person_id,))
+            self._insert(conn, df.reindex(columns=self.columns()))
+            self._bump_generation(conn)
+
+    def last_person_id(self) -> int:
+        row = self._connection().execute(f'SELECT MAX("Person ID") FROM {self.TABLE}').fetchone()
+        return row[0] or 0
+
+    def clean(self, columns_to_delete: List[str], since: Optional[Hashable] = None) -> Optional[Dict[str, Any]]:
+        with self._transaction() as conn:
+            last_person_id = 0
+            if since is not None and since[0] == self._generation(conn):
+                last_person_id = since[1]
+            new_rows = f'"Person ID" > {int(last_person_id)}'
+
+            info = list(conn.execute(f"PRAGMA table_info({self.TABLE})"))
+            columns = [self._quote(row[1]) for row in info]
+            numeric = [self._quote(row[1]) for row in info if row[2].upper() in ('INTEGER', 'REAL')]
+            real = [self._quote(row[1]) for row in info if row[2].upper() == 'REAL']
+
+            rows_checked = conn.execute(f"SELECT COUNT(*) FROM {self.TABLE} WHERE {new_rows}").fetchone()[0]
+            rows_removed = 0
+            # rows with all values missing, all numeric values missing, all numeric values zero,
+            # or an infinite value
+            for condition in (' AND '.join(f"{col} IS NULL" for col in columns),
+                              ' AND '.join(f"{col} IS NULL" for col in numeric),
+                              ' AND '.join(f"{col} = 0" for col in numeric),
+                              ' OR '.join(f"{col} IN (9e999, -9e999)" for col in real)):
+                if condition:
+                    query = f"DELETE FROM {self.TABLE} WHERE {new_rows} AND ({condition})"
+                    rows_removed += conn.execute(query).rowcount
+
+            existing = [row[1] for row in info]
+            dropped = [col for col in columns_to_delete if col in existing]
+            for col in dropped:
+                conn.execute(f"DROP INDEX IF EXISTS {self._quote('idx_' + col)}")
+                conn.execute(f"ALTER TABLE {self.TABLE} DROP COLUMN {self._quote(col)}")
+
+            changed = bool(rows_removed or dropped)
+            if changed:
+                self._bump_generation(conn)
+
+        return {'rows_checked': rows_checked, 'rows_removed': rows_removed, 'changed': changed}
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        The connection of the current thread, opened on first use.
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            # autocommit mode, transactions are started explicitly
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS storage_meta (key TEXT PRIMARY KEY, value INTEGER)")
+            self._local.connection = conn
+        return conn
+
+    @contextmanager
+    def _snapshot(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run queries in one read transaction, so they all see the same data.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run statements in one write transaction, rolled back on error.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _create_table(self, conn: sqlite3.Connection, df: pd.DataFrame) -> None:
+        definitions = []
+        for col, dtype in df.dtypes.items():
+            if col == "Person ID":
+                definitions.append(f"{self._quote(col)} INTEGER PRIMARY KEY AUTOINCREMENT")
+            elif pd.api.types.is_integer_dtype(dtype):
+                definitions.append(f"{self._quote(col)} INTEGER")
+            elif pd.api.types.is_float_dtype(dtype):
+                definitions.append(f"{self._quote(col)} REAL")
+            else:
+                definitions.append(f"{self._quote(col)} TEXT")
+        conn.execute(f"CREATE TABLE {self.TABLE} ({', '.join(definitions)})")
+
+        for col in self.INDEXED_COLUMNS:
+            if col in df.columns:
+                conn.execute(f"CREATE INDEX {self._quote('idx_' + col)} ON {self.TABLE} ({self._quote(col)})")
+
+    def _insert(self, conn: sqlite3.Connection, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        placeholders = ', '.join('?' for _ in df.columns)
+        query = f"INSERT INTO {self.TABLE} ({', '.join(map(self._quote, df.columns))}) VALUES ({placeholders})"
+        # plain Python values, missing values as NULL
+        values = df.astype(object).where(df.notna(), None).values.tolist()
+        conn.executemany(query, values)
+
+    def _mark(self, conn: sqlite3.Connection) -> Hashable:
+        last_person_id = conn.execute(f'SELECT MAX("Person ID") FROM {self.TABLE}').fetchone()[0]
+        return self._generation(conn), last_person_id or 0
+
+    @staticmethod
+    def _generation(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM storage_meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _bump_generation(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "INSERT INTO storage_meta (key, value) VALUES ('generation', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+
+def open_storage(path: str) -> DataStorage:
+    """
+    Open the storage engine that matches the extension of the path:
+    .parquet and .feather/.arrow for the columnar engines, .db/.sqlite/.sqlite3
+    for SQLite, anything else as CSV.
+
+    Args:
+        path (str): Location of the dataset.
+
+    Returns:
+        DataStorage: The storage for the path.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        return ArrowStorage(path, 'parquet')
+    if extension in ('.feather', '.arrow'):
+        return ArrowStorage(path, 'feather')
+    if extension in ('.db', '.sqlite', '.sqlite3'):
+        return SqliteStorage(path)
+    return CsvStorage(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Copy the dataset between storage engines.")
+    parser.add_argument('source', help="path of the existing dataset, e.g. data/sleep.csv")
+    parser.add_argument('target', help="path of the new dataset, e.g. data/sleep.parquet or data/sleep.db")
+    args = parser.parse_args()
+
+    df = open_storage(args.source).read()
+    open_storage(args.target).write(df)
+    print(f"{len(df)} rows copied from {args.source} to {args.target}")
@@ -1,4 +1,3 @@
-import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import ColumnTransformer
@@ -6,6 +5,13 @@ from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
 from dotenv import dotenv_values
 import joblib
+import os
+
+from model_registry import ModelRegistry
+from inference import compact_path, export_compact
+from storage import open_storage
+from file_lock import FileLock
+import data.cfg as cfg
 
 class ModelTrainer:
     def __init__(self, csv_path: str, model_path: str):
@@ -16,15 +22,17 @@ class ModelTrainer:
         self.X = None
         self.y = None
         self.categorical_cols = ["Gender", "Occupation"]
-        self.numeric_cols = ["Age", "Sleep Duration", "Quality of Sleep", "Physical activity level"]
+        self.numeric_cols = ["Age", "Sleep Duration", "Quality of Sleep", "Physical Activity Level"]
+        # the backend builds prediction inputs from these columns only
+        self.feature_cols = self.categorical_cols + self.numeric_cols
 
     def load_data(self):
-        self.data = pd.read_csv(self.csv_path)
+        self.data = open_storage(self.csv_path).read()
         print(f"Data loaded from {self.csv_path}")
 
     def preprocess_data(self):
         target = "Stress Level"
-        self.X = self.data.drop(columns=[target])
+        self.X = self.data[self.feature_cols]
         self.y = self.data[target]
         print("Data is ready.")
 
@@ -59,8 +67,18 @@ class ModelTrainer:
         print(f"Model accuracy: {score:.2f}")
 
     def save_model(self):
-        joblib.dump(self.model, self.model_path)
-        print(f"Model saved in {self.model_path}")
+        # archive the new version and export its compact form,
+        # then atomically replace the model the backend watches;
+        # the temporary file is per process, trainings may run in parallel
+        tmp_path = f"{self.model_path}.{os.getpid()}.tmp"
+        joblib.dump(self.model, tmp_path)
+        version = ModelRegistry(self.model_path, cfg.MODEL_REGISTRY_DIR).archive(tmp_path)
+        with FileLock(f"{compact_path(self.model_path)}.lock").hold():
+            export_compact(self.model, compact_path(self.model_path), version)
+        print(f"Compact model saved in {compact_path(self.model_path)}")
+
+        os.replace(tmp_path, self.model_path)
+        print(f"Model saved in {self.model_path} (version {version})")
 
     def run(self):
         self.load_data()
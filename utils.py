@@ -1,11 +1,12 @@
-import uuid
-from typing import List, Tuple
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
 
 
 class Utils:
     """
-    Utils class provides helper methods for parsing content from a specified file
-    and generating unique keys for chart elements.
+    Utils class provides helper methods for parsing content from a specified file,
+    generating stable keys for chart elements and finding turning points in series.
     """
 
     def __init__(self, file_to_parse: str) -> None:
@@ -18,17 +19,19 @@ class Utils:
         self.PARSE_FILE_PATH: str = file_to_parse
         self.block_headers = {'#TITLE', '#TEXT', '#METHOD', '#CODE'}
 
-    def generate_key(self, prefix: str = "chart") -> str:
+    def generate_key(self, *parts: Any, prefix: str = "chart") -> str:
         """
-        Generate a unique key with a given prefix.
+        Generate a deterministic key from the given parts, so Streamlit keeps the
+        same element across reruns instead of mounting a new one.
 
         Args:
+            *parts (Any): Values identifying the element, e.g. method name and position.
             prefix (str, optional): Prefix for the key. Defaults to "chart".
 
         Returns:
-            str: A unique key.
+            str: The key.
         """
-        return f"{prefix}_{uuid.uuid4().hex}"
+        return "_".join([prefix, *map(str, parts)])
 
     def parse_file(self) -> List[Tuple[str, str]]:
         """
@@ -58,3 +61,78 @@ class Utils:
                 content.append((block_type, block_content.strip()))
 
         return content
+
+    def parse_sections(self) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Parse the file and group the blocks under their titles. Blocks before the
+        first title are ignored.
+
+        Returns:
+            Dict[str, List[Tuple[str, str]]]: Blocks (block_type, block_content) by section title,
+            in document order.
+        """
+        sections: Dict[str, List[Tuple[str, str]]] = {}
+        current_section = None
+        for block_type, block_content in self.parse_file():
+            if block_type == 'title':
+                current_section = sections.setdefault(block_content.strip(), [])
+            elif current_section is not None:
+                current_section.append((block_type, block_content))
+        return sections
+
+    @staticmethod
+    def local_extrema(values: Any,
+                      smooth: int = 1,
+                      prominence: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find local minima and maxima in one or more series at once.
+
+        A point is a local maximum (minimum) if it is strictly greater (smaller) than
+        both neighbours and is not the maximum (minimum) of its series. Its prominence
+        is the distance to the closer of the adjacent turning points (or series ends)
+        on the opposite side, e.g. the height of a peak above the higher neighbouring
+        valley. NaN values are never extrema.
+
+        Args:
+            values (Any): A series, or a 2D array with one series per row.
+            smooth (int, optional): Width of a centered moving average applied first.
+                Defaults to 1 (no smoothing).
+            prominence (float, optional): Minimum prominence of reported extrema. Defaults to 0.0.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Boolean masks of minima and maxima, shaped like the input.
+        """
+        array = np.asarray(values, dtype=np.float64)
+        series = np.atleast_2d(array)
+        n_points = series.shape[1]
+        if smooth > 1:
+            left = smooth // 2
+            padded = np.pad(series, ((0, 0), (left, smooth - 1 - left)), mode='edge')
+            cumulative = np.cumsum(np.pad(padded, ((0, 0), (1, 0))), axis=1)
+            series = (cumulative[:, smooth:] - cumulative[:, :-smooth]) / smooth
+
+        minima = np.zeros(series.shape, dtype=bool)
+        maxima = np.zeros(series.shape, dtype=bool)
+        if n_points < 3:
+            return minima.reshape(array.shape), maxima.reshape(array.shape)
+
+        slope = np.sign(np.diff(series, axis=1))
+        maxima[:, 1:-1] = (slope[:, :-1] > 0) & (slope[:, 1:] < 0)
+        minima[:, 1:-1] = (slope[:, :-1] < 0) & (slope[:, 1:] > 0)
+
+        if prominence > 0:
+            # previous and next turning point of every position, series ends included
+            positions = np.arange(n_points)
+            turning = minima | maxima
+            turning[:, [0, -1]] = True
+            previous = np.maximum.accumulate(np.where(turning, positions, 0), axis=1)
+            following = np.minimum.accumulate(np.where(turning, positions, n_points - 1)[:, ::-1], axis=1)[:, ::-1]
+            before = np.take_along_axis(series, np.concatenate([previous[:, :1], previous[:, :-1]], axis=1), axis=1)
+            after = np.take_along_axis(series, np.concatenate([following[:, 1:], following[:, -1:]], axis=1), axis=1)
+            maxima &= series - np.fmax(before, after) >= prominence
+            minima &= np.fmin(before, after) - series >= prominence
+
+        with np.errstate(invalid='ignore'):
+            maxima &= series != np.nanmax(series, axis=1, keepdims=True)
+            minima &= series != np.nanmin(series, axis=1, keepdims=True)
+        return minima.reshape(array.shape), maxima.reshape(array.shape)